@@ -1,11 +1,26 @@
 import streamlit as st
-from ultralytics import YOLO
-from PIL import Image
-import numpy as np
 import base64
-import cv2
-import os
-import gdown
+import functools
+import logging
+import time
+
+from config import (
+    BATCH_WINDOW_MS, CACHE_DIR, CACHE_ENTRIES, CASCADE_MARGIN, CASCADE_MODEL, COUNTS_ONLY,
+    DISPLAY_CACHE_ENTRIES, DISPLAY_FORMAT, DISPLAY_QUALITY, DISPLAY_WIDTH, FULL_RES_DISPLAY, INFERENCE_TIMEOUT, MAX_BATCH_SIZE, MODEL_BACKEND,
+    LIVE_CHANGE_THRESHOLD, LIVE_SOURCE, LIVE_TARGET_FPS,
+    SHOW_METRICS, TILED_INFERENCE, WORKER_RETRY_S
+)
+from detector import (
+    CONF_THRESHOLD, IOU_THRESHOLD, MODEL_IMGSZ,
+    count_labels, detect_settings, render
+)
+from hygiene import assess, bacteria_density, cascade_stage, sum_counts
+from imaging import decode_image, encode_image
+from inference_worker import InferenceWorker
+from live_stream import stream_counts
+from result_cache import DetectionCache, LRUCache, cache_key
+
+logger = logging.getLogger(__name__)
 
 # =========================================================
 # PAGE CONFIG
@@ -22,18 +37,17 @@ if "uploader_version" not in st.session_state:
     st.session_state.uploader_version = 0
 
 # =========================================================
-# HELPER: LOAD LOGO
+# HELPER: LOAD LOGO (READ + ENCODED ONCE PER PROCESS)
 # =========================================================
+@st.cache_resource
 def get_base64_image(image_path):
     with open(image_path, "rb") as img_file:
         return base64.b64encode(img_file.read()).decode()
 
-logo_base64 = get_base64_image("SOMAEYE-Bacteria.jpeg")
-
 # =========================================================
 # CUSTOM CSS (ONLY FINAL RESULT COLORS + FONT SIZE)
 # =========================================================
-st.markdown("""
+CUSTOM_CSS = """
 <style>
 .stApp {
     background: linear-gradient(90deg, #d8f1ff 0%, #eef8ff 100%);
@@ -90,79 +104,183 @@ st.markdown("""
 .final-critical { background-color: #ef4444; }
 .final-caution { background-color: #f59e0b; } /* ORANGE-YELLOW */
 </style>
-""", unsafe_allow_html=True)
+"""
 
 # =========================================================
 # HEADER
 # =========================================================
-st.markdown(
-    f"""
+@st.cache_resource
+def get_page_chrome():
+    # CSS + header HTML built once per process and sent as a single element
+    logo_base64 = get_base64_image("SOMAEYE-Bacteria.jpeg")
+    return CUSTOM_CSS + f"""
     <div style="display:flex;flex-direction:column;align-items:center;margin-bottom:20px;">
         <img src="data:image/png;base64,{logo_base64}" style="width:360px;">
         <h1>AI-Powered Surface Hygiene Verification For CIP in Dairy Processing</h1>
         
     </div>
-    """,
-    unsafe_allow_html=True
-)
+    """
+
+chrome_start = time.perf_counter()
+st.markdown(get_page_chrome(), unsafe_allow_html=True)
+chrome_ms = (time.perf_counter() - chrome_start) * 1000
+logger.debug("UI chrome (CSS + header) took %.2f ms this rerun", chrome_ms)
 
 # =========================================================
-# CLASS COLORS
+# SHARED INFERENCE WORKER (ONE MODEL PER SERVER PROCESS)
 # =========================================================
-CLASS_COLORS = {
-    "bacteria": {"bgr": (0, 0, 255)},
-    "milk_residues": {"bgr": (0, 255, 0)},
-    "debries": {"bgr": (255, 0, 0)}
-}
-
+def worker_usable(worker):
+    # A failed worker (transient download error, crash) is replaced after a back-off
+    if worker.error is None or time.time() - worker.failed_at < WORKER_RETRY_S:
+        return True
+    worker.close()
+    return False
+
+@st.cache_resource(validate=worker_usable)
+def get_inference_worker(backend=MODEL_BACKEND):
+    return InferenceWorker(backend, BATCH_WINDOW_MS, MAX_BATCH_SIZE, CASCADE_MODEL)
+
+# Created on the first page load and never waited on: the worker downloads,
+# loads and warms the model in the background while the page stays usable
+worker = get_inference_worker()
+
+if worker.error:
+    st.error(f"AI model failed to load: {worker.error}")
+
+    @st.fragment(run_every=5)
+    def retry_status():
+        remaining = WORKER_RETRY_S - (time.time() - worker.failed_at)
+        if remaining <= 0:
+            # The full rerun finds the cached worker unusable and starts a new one
+            st.rerun()
+        st.caption(f"Retrying in {remaining:.0f} s...")
+
+    retry_status()
+elif not worker.ready:
+    # Polls only while loading; the full rerun drops the timer and picks up queued samples
+    @st.fragment(run_every=1)
+    def model_status():
+        if worker.ready or worker.error:
+            st.rerun()
+        step, total, message = worker.status
+        st.progress(step / total, text=message)
+
+    model_status()
+
+if SHOW_METRICS:
+    with st.sidebar.expander("Inference scheduler", expanded=True):
+        st.json(worker.metrics)
+    st.sidebar.caption(f"UI chrome (CSS + header): {chrome_ms:.2f} ms this rerun")
 
 # =========================================================
-# LOAD YOLO MODEL FROM GOOGLE DRIVE (SINGLE FILE)
+# DETECTION CACHE (SHARED BY ALL SESSIONS)
 # =========================================================
-GDRIVE_FILE_ID = "1wYIHhpl_aCHKui3yMo-7I8kqucmUtED2"
-MODEL_NAME = "Yolov11_BacteriaDetection.pt"
-MODEL_DIR = "models"
-MODEL_PATH = os.path.join(MODEL_DIR, MODEL_NAME)
-
 @st.cache_resource
-def load_yolo_model():
-    os.makedirs(MODEL_DIR, exist_ok=True)
-
-    if not os.path.exists(MODEL_PATH):
-        with st.spinner("Downloading AI model from Google Drive..."):
-            gdown.download(
-                id=GDRIVE_FILE_ID,
-                output=MODEL_PATH,
-                quiet=False
-            )
-
-    return YOLO(MODEL_PATH)
+def get_detection_cache():
+    return DetectionCache(CACHE_ENTRIES, CACHE_DIR or None)
 
-if "yolo_model" not in st.session_state:
-    st.session_state.yolo_model = load_yolo_model()
+@st.cache_resource
+def get_display_cache():
+    return LRUCache(DISPLAY_CACHE_ENTRIES)
+
+# Reduced-scale JPEG decode unless the full frame is needed; boxes live in decoded
+# pixel space, so the decode size is part of the cache key
+DECODE_MIN_SIZE = None if (TILED_INFERENCE or FULL_RES_DISPLAY) else MODEL_IMGSZ
+DETECT_SETTINGS = f"{detect_settings()}|decode:{DECODE_MIN_SIZE or 'full'}"
+
+def detect_cached(data, image, worker, model="full"):
+    cache = get_detection_cache()
+    keys = [
+        cache_key(d, worker.model_versions[model], CONF_THRESHOLD, IOU_THRESHOLD, DETECT_SETTINGS)
+        for d in data
+    ]
+
+    detections = [cache.get(key) for key in keys]
+    missing = [i for i, d in enumerate(detections) if d is None]
+    if missing:
+        # Only uncached images reach the model, still as a single batch
+        batch = worker.detect_batch(
+            [image(i) for i in missing], timeout=INFERENCE_TIMEOUT, model=model
+        )
+        for i, d in zip(missing, batch):
+            cache.put(keys[i], d)
+            detections[i] = d
+
+    return keys, detections
+
+def detect_sample(files, worker):
+    data = [f.getvalue() for f in files]
+
+    # Decoded only on a cache miss, so a rerun on the same sample decodes nothing
+    @functools.cache
+    def image(i):
+        return decode_image(data[i], DECODE_MIN_SIZE)
+
+    stage = "full"
+    if "fast" in worker.model_labels:
+        keys, detections = detect_cached(data, image, worker, "fast")
+        stage = cascade_stage(
+            (count_labels(d.cls, worker.model_labels["fast"]) for d in detections), CASCADE_MARGIN
+        )
+
+    if stage == "full":
+        keys, detections = detect_cached(data, image, worker, "full")
+
+    return data, image, keys, detections, worker.model_labels[stage], stage
+
+def display_image(key, image, detections, labels, full_resolution=False):
+    # Rendered and encoded once per sample image; reruns resend the cached bytes
+    width = None if full_resolution else DISPLAY_WIDTH
+    display_key = f"{key}|{width or 'full'}|{DISPLAY_FORMAT}|{DISPLAY_QUALITY}"
+
+    cache = get_display_cache()
+    encoded = cache.get(display_key)
+    if encoded is None:
+        encoded = encode_image(render(image(), detections, labels, width), DISPLAY_FORMAT, DISPLAY_QUALITY)
+        cache.put(display_key, encoded)
+    return encoded
 
 # =========================================================
-# YOLO INFERENCE
+# LIVE STREAM MODE (BORESCOPE VIDEO / CAMERA)
 # =========================================================
-def run_yolo(img_pil, model):
-    img = np.array(img_pil)
-    img_bgr = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
-    results = model(img, conf=0.25, iou=0.5)
-    counts = {}
-
-    if results and results[0].boxes is not None:
-        for box, cls_id in zip(
-            results[0].boxes.xyxy.cpu().numpy(),
-            results[0].boxes.cls.cpu().numpy().astype(int)
-        ):
-            label = results[0].names[int(cls_id)].lower().strip()
-            counts[label] = counts.get(label, 0) + 1
-
-            color = CLASS_COLORS.get(label, {}).get("bgr", (0, 255, 0))
-            x1, y1, x2, y2 = map(int, box)
-            cv2.rectangle(img_bgr, (x1, y1), (x2, y2), color, 2)
+if st.sidebar.toggle("📹 Live stream", key="live_stream"):
+    source = st.sidebar.text_input("Video file, stream URL or camera index", LIVE_SOURCE)
+    target_fps = st.sidebar.slider("Target processing FPS", 1, 30, int(LIVE_TARGET_FPS))
+    loop = st.sidebar.checkbox("Loop video file", value=True)
+
+    if not worker.ready:
+        st.info("The live stream starts as soon as the AI model is ready.")
+    elif source:
+        frame_slot = st.empty()
+        m1, m2, m3 = st.columns(3)
+        bacteria_slot, milk_slot, debries_slot = m1.empty(), m2.empty(), m3.empty()
+        status_slot = st.empty()
+
+        # Runs until the user changes a widget; the rerun stops the loop and releases the source
+        updates = stream_counts(
+            source, lambda frame: worker.detect_batch([frame], timeout=INFERENCE_TIMEOUT)[0],
+            worker.labels, target_fps, LIVE_CHANGE_THRESHOLD, loop, DISPLAY_WIDTH
+        )
+        try:
+            for update in updates:
+                # Unchanged frames keep the last detection on screen
+                if update.inferred:
+                    frame_slot.image(encode_image(update.image, DISPLAY_FORMAT, DISPLAY_QUALITY), use_container_width=True)
+                    bacteria_slot.metric("Bacteria Count", update.counts.get("bacteria", 0))
+                    milk_slot.metric("Milk Residues Count", update.counts.get("milk_residues", 0))
+                    debries_slot.metric("Debries Count", update.counts.get("debries", 0))
+                status_slot.caption(
+                    f"Frame {update.frame_index} · every {update.stride} frame(s) read · {update.fps:.1f} fps"
+                )
+        except ValueError as exc:
+            st.error(str(exc))
+        else:
+            st.info("End of video.")
+    else:
+        st.info("Enter a video file, stream URL or camera index (0 for the first camera) in the sidebar.")
 
-    return counts, cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
+    # Live mode replaces the two-image upload flow
+    st.stop()
 
 # =========================================================
 # FILE UPLOADER
@@ -174,68 +292,96 @@ uploaded_files = st.file_uploader(
     key=f"image_uploader_{st.session_state.uploader_version}"
 )
 
+# Automated gates only need counts and the verdict: no annotated images, no cards
+counts_only = st.toggle("⚡ Counts only", value=COUNTS_ONLY, key="counts_only")
+
 # =========================================================
 # MAIN EXECUTION
 # =========================================================
-if uploaded_files and len(uploaded_files) == 2:
+if uploaded_files and len(uploaded_files) == 2 and not worker.ready:
+    # Queued: the status fragment reruns the page as soon as the model is ready
+    if not worker.error:
+        st.info("Sample received. It will be analysed as soon as the AI model is ready.")
 
-    img1 = Image.open(uploaded_files[0]).convert("RGB")
-    img2 = Image.open(uploaded_files[1]).convert("RGB")
+elif uploaded_files and len(uploaded_files) == 2:
 
-    counts1, ann_img1 = run_yolo(img1, st.session_state.yolo_model)
-    counts2, ann_img2 = run_yolo(img2, st.session_state.yolo_model)
+    data, image, keys, detections, labels, stage = detect_sample(uploaded_files, worker)
 
-    total_counts = {}
-    for d in (counts1, counts2):
-        for k, v in d.items():
-            total_counts[k] = total_counts.get(k, 0) + v
+    total_counts = sum_counts(count_labels(d.cls, labels) for d in detections)
 
     bacteria = total_counts.get("bacteria", 0)
     milk = total_counts.get("milk_residues", 0)
     debries = total_counts.get("debries", 0)
-
-    # IMAGE DISPLAY
-    col1, col2 = st.columns(2)
-    col1.image(ann_img1, caption="Image 1 – Detection Output", use_container_width=True)
-    col2.image(ann_img2, caption="Image 2 – Detection Output", use_container_width=True)
-
-    # COUNTS
-    s1, s2, s3 = st.columns(3)
-    s1.markdown(f"<div class='card critical'><div class='card-title'>Bacteria Count</div><div class='card-value'>{bacteria}</div></div>", unsafe_allow_html=True)
-    s2.markdown(f"<div class='card parrot-green'><div class='card-title'>Milk Residues Count</div><div class='card-value'>{milk}</div></div>", unsafe_allow_html=True)
-    s3.markdown(f"<div class='card info'><div class='card-title'>Debries Count</div><div class='card-value'>{debries}</div></div>", unsafe_allow_html=True)
-
-    # BACTERIA / ML & CFU
-    if bacteria > 0:
-        bacteria_ml = int(bacteria * 1000)
-        cfu = int(np.round(bacteria_ml / 3))
-
-        c1, c2 = st.columns(2)
-        c1.markdown(f"<div class='card critical'><div class='card-title'>Bacteria / ml</div><div class='card-value'>{bacteria_ml}</div></div>", unsafe_allow_html=True)
-        c2.markdown(f"<div class='card critical'><div class='card-title'>CFU / ml</div><div class='card-value'>{cfu}</div></div>", unsafe_allow_html=True)
-
-    # =====================================================
-    # FINAL RESULT (WITH CAUTION CONDITION)
-    if bacteria > 15 or milk > 10 or debries > 10:
-        st.markdown("""
-        <div class="final-card final-critical">
-            ✖ Surface Is Not Clean
-        </div>
-        """, unsafe_allow_html=True)
-
-    elif (5 <= bacteria <= 15) or (5 <= milk <= 10) or (5 <= debries <= 10):
-        st.markdown("""
-        <div class="final-card final-caution">
-            ⚠️ Caution
-        </div>
-        """, unsafe_allow_html=True)
+    verdict = assess(total_counts)
+
+    if counts_only:
+        # COUNTS-ONLY RESULT (plain metrics, nothing decoded for display or drawn)
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Bacteria Count", bacteria)
+        m2.metric("Milk Residues Count", milk)
+        m3.metric("Debries Count", debries)
+
+        if verdict == "critical":
+            st.error("✖ Surface Is Not Clean")
+        elif verdict == "caution":
+            st.warning("⚠️ Caution")
+        else:
+            st.success("✅ Surface Is Clean")
 
     else:
-        st.markdown("""
-        <div class="final-card final-clean">
-            ✅ Surface Is Clean
-        </div>
-        """, unsafe_allow_html=True)
+        # IMAGE DISPLAY
+        col1, col2 = st.columns(2)
+        for i, col in enumerate((col1, col2)):
+            slot = col.empty()
+            # Full resolution only on request: decoded, drawn and encoded on first toggle
+            if col.toggle("🔍 Full resolution", key=f"full_res_{i}_{st.session_state.uploader_version}"):
+                shown = display_image(keys[i], lambda i=i: decode_image(data[i]), detections[i], labels, True)
+            else:
+                shown = display_image(keys[i], lambda i=i: image(i), detections[i], labels)
+            slot.image(shown, caption=f"Image {i + 1} – Detection Output", use_container_width=True)
+
+        # COUNTS
+        s1, s2, s3 = st.columns(3)
+        s1.markdown(f"<div class='card critical'><div class='card-title'>Bacteria Count</div><div class='card-value'>{bacteria}</div></div>", unsafe_allow_html=True)
+        s2.markdown(f"<div class='card parrot-green'><div class='card-title'>Milk Residues Count</div><div class='card-value'>{milk}</div></div>", unsafe_allow_html=True)
+        s3.markdown(f"<div class='card info'><div class='card-title'>Debries Count</div><div class='card-value'>{debries}</div></div>", unsafe_allow_html=True)
+
+        # BACTERIA / ML & CFU
+        if bacteria > 0:
+            bacteria_ml, cfu = bacteria_density(bacteria)
+
+            c1, c2 = st.columns(2)
+            c1.markdown(f"<div class='card critical'><div class='card-title'>Bacteria / ml</div><div class='card-value'>{bacteria_ml}</div></div>", unsafe_allow_html=True)
+            c2.markdown(f"<div class='card critical'><div class='card-title'>CFU / ml</div><div class='card-value'>{cfu}</div></div>", unsafe_allow_html=True)
+
+        # =====================================================
+        # FINAL RESULT (WITH CAUTION CONDITION)
+        if verdict == "critical":
+            st.markdown("""
+            <div class="final-card final-critical">
+                ✖ Surface Is Not Clean
+            </div>
+            """, unsafe_allow_html=True)
+
+        elif verdict == "caution":
+            st.markdown("""
+            <div class="final-card final-caution">
+                ⚠️ Caution
+            </div>
+            """, unsafe_allow_html=True)
+
+        else:
+            st.markdown("""
+            <div class="final-card final-clean">
+                ✅ Surface Is Clean
+            </div>
+            """, unsafe_allow_html=True)
+
+    if CASCADE_MODEL:
+        if stage == "fast":
+            st.caption("Verdict decided by the fast screening model (stage 1).")
+        else:
+            st.caption("Verdict decided by the full model (stage 2): screening counts were near a threshold.")
 
     # NEXT SAMPLE
     st.markdown("---")
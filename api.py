@@ -0,0 +1,131 @@
+import argparse
+import asyncio
+from contextlib import asynccontextmanager
+import logging
+
+from starlette.applications import Starlette
+from starlette.datastructures import UploadFile
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from config import (
+    API_MAX_IN_FLIGHT, API_QUEUE_TIMEOUT, BATCH_WINDOW_MS, CASCADE_MARGIN, CASCADE_MODEL,
+    INFERENCE_TIMEOUT, MAX_BATCH_SIZE, MODEL_BACKEND, TILED_INFERENCE
+)
+from detector import MODEL_IMGSZ, count_labels
+from hygiene import cascade_stage, sample_report
+from imaging import decode_image
+from inference_worker import InferenceWorker
+
+logger = logging.getLogger(__name__)
+
+# =========================================================
+# HTTP INFERENCE API
+# The UI's two-image hygiene verification for MES / PLC gateways:
+#   POST /v1/samples   multipart, exactly 2 image files
+#   GET  /health       200 once the model is ready, 503 while loading
+# Inference goes through the same InferenceWorker (model loading,
+# micro-batching, cascade) as the Streamlit app; at most
+# SOMAEYE_API_MAX_IN_FLIGHT requests are in inference at once.
+#   python api.py --port 8600
+# =========================================================
+SAMPLE_SIZE = 2
+
+@asynccontextmanager
+async def lifespan(app):
+    app.state.worker = InferenceWorker(MODEL_BACKEND, BATCH_WINDOW_MS, MAX_BATCH_SIZE, CASCADE_MODEL)
+    app.state.slots = asyncio.Semaphore(API_MAX_IN_FLIGHT)
+    try:
+        yield
+    finally:
+        app.state.worker.close()
+
+def error(status, message, **headers):
+    return JSONResponse({"error": message}, status_code=status, headers=headers or None)
+
+async def detect(worker, imgs, model):
+    # Shielded: a timeout or client disconnect must not cancel the worker's Future
+    # under the reader thread; the late reply is simply dropped
+    future = asyncio.wrap_future(worker.submit(imgs, model=model))
+    return await asyncio.wait_for(asyncio.shield(future), INFERENCE_TIMEOUT)
+
+async def score(worker, imgs):
+    stage = "full"
+    if "fast" in worker.model_labels:
+        detections = await detect(worker, imgs, "fast")
+        counts = [count_labels(d.cls, worker.model_labels["fast"]) for d in detections]
+        stage = cascade_stage(counts, CASCADE_MARGIN)
+
+    if stage == "full":
+        detections = await detect(worker, imgs, "full")
+        counts = [count_labels(d.cls, worker.model_labels["full"]) for d in detections]
+
+    report = sample_report(counts)
+    report.update(stage=stage, model_version=worker.model_versions[stage])
+    return report
+
+async def health(request):
+    worker = request.app.state.worker
+    step, total, message = worker.status
+    body = {"ready": worker.ready, "status": message, "progress": step / total, "error": worker.error}
+    return JSONResponse(body, status_code=200 if worker.ready else 503)
+
+async def samples(request):
+    worker = request.app.state.worker
+    if worker.error:
+        return error(503, f"AI model failed to load: {worker.error}")
+    if not worker.ready:
+        return error(503, "AI model is still loading", **{"Retry-After": "5"})
+
+    async with request.form() as form:
+        files = [value for _, value in form.multi_items() if isinstance(value, UploadFile)]
+        if len(files) != SAMPLE_SIZE:
+            return error(400, f"Expected exactly {SAMPLE_SIZE} image files, got {len(files)}")
+        data = [await f.read() for f in files]
+
+    # Bounded in-flight inference; a request that cannot get a slot in time is turned away
+    try:
+        await asyncio.wait_for(request.app.state.slots.acquire(), API_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        return error(503, "Inference queue is full", **{"Retry-After": "1"})
+    try:
+        # Decoding is CPU work; keep it off the event loop
+        min_size = None if TILED_INFERENCE else MODEL_IMGSZ
+        try:
+            imgs = await asyncio.gather(*(asyncio.to_thread(decode_image, d, min_size) for d in data))
+        except ValueError as exc:
+            return error(422, str(exc))
+        report = await score(worker, imgs)
+    except asyncio.TimeoutError:
+        return error(504, "Inference timed out")
+    except RuntimeError as exc:
+        logger.exception("Inference failed")
+        return error(500, str(exc))
+    finally:
+        request.app.state.slots.release()
+
+    report["images"] = [f.filename for f in files]
+    return JSONResponse(report)
+
+app = Starlette(
+    routes=[
+        Route("/health", health),
+        Route("/v1/samples", samples, methods=["POST"]),
+    ],
+    lifespan=lifespan,
+)
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the hygiene verification over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    # One process: the model lives in its InferenceWorker, shared by every request
+    uvicorn.run(app, host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
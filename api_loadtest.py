@@ -0,0 +1,79 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import statistics
+import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+from scheduler import p95
+
+# =========================================================
+# HTTP API LOAD TEST
+# Posts the same two-image sample to a running api.py from N
+# concurrent clients and reports throughput, latency and status codes.
+#   python api.py --port 8600 &
+#   python api_loadtest.py img1.jpg img2.jpg --concurrency 16 --requests 200
+# =========================================================
+def multipart_body(paths):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for i, path in enumerate(paths):
+        with open(path, "rb") as f:
+            data = f.read()
+        parts.append(
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"image{i + 1}\"; "
+            f"filename=\"{os.path.basename(path)}\"\r\nContent-Type: application/octet-stream\r\n\r\n".encode()
+            + data + b"\r\n"
+        )
+    body = b"".join(parts) + f"--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+def post_sample(url, body, content_type, timeout):
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": content_type})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            json.load(response)
+            status = response.status
+    except urllib.error.HTTPError as exc:
+        status = exc.code
+    except (urllib.error.URLError, TimeoutError):
+        status = "timeout/connection"
+    return status, (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the hygiene verification API.")
+    parser.add_argument("images", nargs=2, help="the two images of one sample")
+    parser.add_argument("--url", default="http://127.0.0.1:8600/v1/samples")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    body, content_type = multipart_body(args.images)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(
+            lambda _: post_sample(args.url, body, content_type, args.timeout), range(args.requests)
+        ))
+    elapsed = time.perf_counter() - start
+
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    latencies = sorted(ms for status, ms in results if status == 200)
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent, {elapsed:.2f} s")
+    print(f"throughput  {args.requests / elapsed:.1f} req/s")
+    print(f"status      {statuses}")
+    if latencies:
+        print(f"latency ms  mean {statistics.mean(latencies):.1f}  p50 {statistics.median(latencies):.1f}  "
+              f"p95 {p95(latencies):.1f}  max {latencies[-1]:.1f}")
+    sys.exit(0 if statuses.get(200) == args.requests else 1)
+
+if __name__ == "__main__":
+    main()
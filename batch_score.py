@@ -0,0 +1,106 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import glob
+import json
+import logging
+import multiprocessing as mp
+import os
+import sys
+
+from config import MODEL_BACKEND, TILED_INFERENCE
+from detector import BACKENDS, MODEL_IMGSZ, count_batch, list_images, load_model, prepare_model
+from hygiene import CRITICAL_ABOVE, sample_report
+from imaging import read_image
+
+# =========================================================
+# HEADLESS BATCH SCORING
+# Scores an archive of CIP captures without the UI: images are grouped
+# into samples (consecutive pairs by default, in sorted path order), each
+# worker process loads the model once, and one row per sample streams
+# out in input order with counts, Bacteria/ml, CFU/ml and the verdict.
+#   python batch_score.py archive/2024-05-02/ --format csv > day.csv
+#   python batch_score.py "captures/*.jpg" --group-size 2 --workers 4
+# =========================================================
+FIELDS = ("sample", "images") + tuple(CRITICAL_ABOVE) + ("bacteria_per_ml", "cfu_per_ml", "verdict", "error")
+
+# Set in each worker process by init_worker
+_model = None
+_tiled = None
+
+def collect_paths(inputs):
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(list_images(item))
+        else:
+            paths.extend(sorted(glob.glob(item)))
+    # A file matched twice (folder and glob) would shift every later pair
+    return list(dict.fromkeys(paths))
+
+def group_samples(paths, group_size):
+    samples = [paths[i:i + group_size] for i in range(0, len(paths), group_size)]
+    if samples and len(samples[-1]) < group_size:
+        logging.warning("Skipping incomplete last sample: %s", ", ".join(samples.pop()))
+    return samples
+
+def init_worker(backend, tiled):
+    global _model, _tiled
+    logging.basicConfig(level=logging.WARNING)
+    _model = load_model(backend)
+    _tiled = tiled
+
+def score_sample(paths):
+    row = {"images": ";".join(paths)}
+    try:
+        # Same decode as the app: reduced-scale JPEG unless tiling needs the full frame
+        imgs = [read_image(path, None if _tiled else MODEL_IMGSZ) for path in paths]
+        row.update(sample_report(count_batch(imgs, _model, _tiled)))
+    except Exception as exc:
+        row["error"] = f"{type(exc).__name__}: {exc}"
+    return row
+
+def write_rows(rows, fmt, out):
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=FIELDS, restval="")
+        writer.writeheader()
+    for i, row in enumerate(rows):
+        row = {"sample": i, **row}
+        if fmt == "csv":
+            writer.writerow(row)
+        else:
+            out.write(json.dumps(row) + "\n")
+        # Rows are visible as soon as each sample is scored
+        out.flush()
+
+def main():
+    parser = argparse.ArgumentParser(description="Score folders of inspection images without the UI.")
+    parser.add_argument("inputs", nargs="+", help="image folders and/or glob patterns")
+    parser.add_argument("--group-size", type=int, default=2, help="images per sample")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--backend", default=MODEL_BACKEND, choices=BACKENDS)
+    parser.add_argument("--tiled", action="store_true", default=TILED_INFERENCE)
+    parser.add_argument("--format", default="jsonl", choices=("jsonl", "csv"))
+    parser.add_argument("--output", help="file to write (default: stdout)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    samples = group_samples(collect_paths(args.inputs), args.group_size)
+    if not samples:
+        sys.exit(f"No complete samples of {args.group_size} images in {' '.join(args.inputs)}")
+
+    prepare_model(args.backend)
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        with ProcessPoolExecutor(
+            max_workers=args.workers, mp_context=mp.get_context("spawn"),
+            initializer=init_worker, initargs=(args.backend, args.tiled)
+        ) as pool:
+            write_rows(pool.map(score_sample, samples), args.format, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import statistics
+import sys
+import time
+
+from detector import BACKENDS, list_images, load_model, run_yolo
+from imaging import read_image
+from scheduler import p95
+
+# =========================================================
+# BACKEND LATENCY BENCHMARK
+# Times run_yolo per image for each backend on the same images.
+# time_backend also times other per-input paths (run(item, model)).
+#   python benchmark.py samples/ --backends torch openvino
+# =========================================================
+def time_backend(model, imgs, repeats, run=run_yolo):
+    # First call pays lazy initialisation; keep it out of the numbers
+    run(imgs[0], model)
+
+    timings = []
+    for _ in range(repeats):
+        for img in imgs:
+            start = time.perf_counter()
+            run(img, model)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare run_yolo latency across inference backends.")
+    parser.add_argument("images", help="folder of sample images")
+    parser.add_argument("--backends", nargs="+", default=["torch", "openvino"], choices=BACKENDS)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = list_images(args.images)
+    if not paths:
+        sys.exit(f"No images found in {args.images}")
+    imgs = [read_image(path) for path in paths]
+
+    print(f"{len(imgs)} images x {args.repeats} repeats")
+    print(f"{'backend':<12}{'load s':>9}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for backend in args.backends:
+        start = time.perf_counter()
+        model = load_model(backend)
+        load_s = time.perf_counter() - start
+
+        timings = time_backend(model, imgs, args.repeats)
+        print(f"{backend:<12}{load_s:>9.2f}{statistics.mean(timings):>10.1f}"
+              f"{statistics.median(timings):>10.1f}{p95(timings):>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import os
+
+def _env_flag(name, default=False):
+    return os.environ.get(name, "1" if default else "0").strip().lower() in ("1", "true", "yes", "on")
+
+def _env_sizes(name, default):
+    # "4032x3024,640x640" -> ((3024, 4032), (640, 640)) as (height, width)
+    sizes = []
+    for item in os.environ.get(name, default).split(","):
+        if item.strip():
+            w, h = item.lower().split("x")
+            sizes.append((int(h), int(w)))
+    return tuple(sizes)
+
+# =========================================================
+# SITE CONFIGURATION (ENVIRONMENT OVERRIDES)
+# =========================================================
+# Inference backend: "torch" (default), "onnx", "openvino" or "openvino_int8"
+# (the INT8 model must be produced by quantize.py first)
+MODEL_BACKEND = os.environ.get("SOMAEYE_BACKEND", "torch").strip().lower()
+
+# Model weights: a pre-seeded directory checked before Google Drive (empty = none), and
+# offline mode, which never touches the network (weights must be local or in the cache)
+MODEL_CACHE_DIR = os.environ.get("SOMAEYE_MODEL_CACHE", "")
+OFFLINE = _env_flag("SOMAEYE_OFFLINE")
+
+# Tiled inference for high-resolution captures: overlapping tiles of TILE_SIZE px,
+# at most MAX_TILES per image (tiles grow to respect it), TILE_BATCH tiles per forward pass
+TILED_INFERENCE = _env_flag("SOMAEYE_TILED")
+TILE_SIZE = int(os.environ.get("SOMAEYE_TILE_SIZE", "640"))
+TILE_OVERLAP = float(os.environ.get("SOMAEYE_TILE_OVERLAP", "0.2"))
+MAX_TILES = int(os.environ.get("SOMAEYE_MAX_TILES", "16"))
+TILE_BATCH = int(os.environ.get("SOMAEYE_TILE_BATCH", "16"))
+
+# Detection cache: in-memory LRU entries, plus an optional on-disk tier (empty = off)
+CACHE_ENTRIES = int(os.environ.get("SOMAEYE_CACHE_ENTRIES", "64"))
+CACHE_DIR = os.environ.get("SOMAEYE_CACHE_DIR", "")
+
+# Seconds a session waits for the shared inference worker before giving up
+INFERENCE_TIMEOUT = float(os.environ.get("SOMAEYE_INFERENCE_TIMEOUT", "120"))
+
+# Seconds before a failed inference worker (e.g. download error, crash) is started again
+WORKER_RETRY_S = float(os.environ.get("SOMAEYE_WORKER_RETRY_S", "30"))
+
+# Micro-batching in the inference worker: wait up to BATCH_WINDOW_MS after the first
+# pending request for others (from any session), up to MAX_BATCH_SIZE images per pass
+BATCH_WINDOW_MS = float(os.environ.get("SOMAEYE_BATCH_WINDOW_MS", "20"))
+MAX_BATCH_SIZE = int(os.environ.get("SOMAEYE_MAX_BATCH_SIZE", "8"))
+SHOW_METRICS = _env_flag("SOMAEYE_SHOW_METRICS")
+
+# HTTP API (api.py): inference requests in flight at once, and how long a request may
+# wait for a slot before it is turned away with 503
+API_MAX_IN_FLIGHT = int(os.environ.get("SOMAEYE_API_MAX_IN_FLIGHT", "4"))
+API_QUEUE_TIMEOUT = float(os.environ.get("SOMAEYE_API_QUEUE_TIMEOUT", "30"))
+
+# Dummy inputs (WIDTHxHEIGHT, comma separated, empty = off) run once after the
+# model loads so the first real sample does not pay for lazy initialisation
+WARMUP_SIZES = _env_sizes("SOMAEYE_WARMUP_SIZES", "640x640,4032x3024")
+
+# Two-stage cascade: a small screening detector (.pt/.onnx/OpenVINO dir; empty = off)
+# scores every sample, the full model only runs when a count is within
+# CASCADE_MARGIN of a verdict threshold
+CASCADE_MODEL = os.environ.get("SOMAEYE_CASCADE_MODEL", "")
+CASCADE_MARGIN = int(os.environ.get("SOMAEYE_CASCADE_MARGIN", "2"))
+
+# Decode uploads at full resolution for display; otherwise JPEGs are decoded at the
+# smallest DCT scale that still covers the model input (tiled inference always uses full size)
+FULL_RES_DISPLAY = _env_flag("SOMAEYE_FULL_RES_DISPLAY")
+
+# Counts-only mode (default of the UI toggle): counts and verdict, no annotated images or cards
+COUNTS_ONLY = _env_flag("SOMAEYE_COUNTS_ONLY")
+
+# Annotated images are drawn on a copy downsized to this width (px) for display
+DISPLAY_WIDTH = int(os.environ.get("SOMAEYE_DISPLAY_WIDTH", "960"))
+
+# Display images are sent to the browser encoded once (jpeg or webp) and cached per sample
+DISPLAY_FORMAT = os.environ.get("SOMAEYE_DISPLAY_FORMAT", "jpeg").strip().lower()
+DISPLAY_QUALITY = int(os.environ.get("SOMAEYE_DISPLAY_QUALITY", "80"))
+DISPLAY_CACHE_ENTRIES = int(os.environ.get("SOMAEYE_DISPLAY_CACHE_ENTRIES", "32"))
+
+# Live stream mode: default source (video file, stream URL or camera index), processing
+# rate to hold by skipping frames, and the mean thumbnail difference (0-255) that counts
+# as a changed frame worth re-detecting
+LIVE_SOURCE = os.environ.get("SOMAEYE_LIVE_SOURCE", "")
+LIVE_TARGET_FPS = float(os.environ.get("SOMAEYE_LIVE_TARGET_FPS", "5"))
+LIVE_CHANGE_THRESHOLD = float(os.environ.get("SOMAEYE_LIVE_CHANGE_THRESHOLD", "4"))
@@ -0,0 +1,57 @@
+import argparse
+import statistics
+import sys
+
+from benchmark import time_backend
+from config import DISPLAY_FORMAT, DISPLAY_QUALITY, DISPLAY_WIDTH, MODEL_BACKEND
+from detector import (
+    BACKENDS, MODEL_IMGSZ, count_batch, count_labels, detect_batch, list_images, load_model, render
+)
+from hygiene import sample_report
+from imaging import encode_image, read_image
+
+# =========================================================
+# COUNTS-ONLY BENCHMARK
+# Time per sample (pairs of images) of the UI path - detect, draw on a
+# display-sized copy, encode - against the counts-only path, which
+# stops after counting. Decoding is done up front and not timed.
+#   python counts_benchmark.py samples/ --backend openvino
+# =========================================================
+def annotated_sample(imgs, model):
+    detections = detect_batch(imgs, model)
+    shown = [
+        encode_image(render(img, d, model.labels, DISPLAY_WIDTH), DISPLAY_FORMAT, DISPLAY_QUALITY)
+        for img, d in zip(imgs, detections)
+    ]
+    return sample_report(count_labels(d.cls, model.labels) for d in detections), shown
+
+def counts_only_sample(imgs, model):
+    return sample_report(count_batch(imgs, model))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the annotated UI path with the counts-only path.")
+    parser.add_argument("images", help="folder of sample images, taken in pairs")
+    parser.add_argument("--backend", default=MODEL_BACKEND, choices=BACKENDS)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = list_images(args.images)
+    if len(paths) < 2:
+        sys.exit(f"Need at least 2 images in {args.images}")
+    imgs = [read_image(path, MODEL_IMGSZ) for path in paths]
+    samples = [imgs[i:i + 2] for i in range(0, len(imgs) - 1, 2)]
+    model = load_model(args.backend)
+
+    print(f"{len(samples)} samples x {args.repeats} repeats, backend {args.backend}")
+    print(f"{'path':<14}{'mean ms':>10}{'p50 ms':>10}")
+    means = {}
+    for name, fn in (("annotated", annotated_sample), ("counts-only", counts_only_sample)):
+        timings = time_backend(model, samples, args.repeats, run=fn)
+        means[name] = statistics.mean(timings)
+        print(f"{name:<14}{means[name]:>10.1f}{statistics.median(timings):>10.1f}")
+
+    saved = means["annotated"] - means["counts-only"]
+    print(f"counts-only saves {saved:.1f} ms per sample ({saved / means['annotated']:.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import io
+import multiprocessing as mp
+import sys
+import time
+import numpy as np
+from PIL import Image
+
+from detector import MODEL_IMGSZ
+from imaging import decode_image
+from lazy import lazy_module
+
+cv2 = lazy_module("cv2")
+
+# =========================================================
+# DECODE PIPELINE BENCHMARK
+# Peak RSS and time of turning upload bytes into the arrays the app
+# holds per image: the original PIL -> NumPy -> BGR -> RGB chain, a
+# single cv2.imdecode BGR buffer, and a DCT-scaled decode sized for the model.
+#   python decode_benchmark.py samples/*.jpg
+# =========================================================
+def legacy_pipeline(data):
+    img_pil = Image.open(io.BytesIO(data)).convert("RGB")
+    img = np.array(img_pil)
+    img_bgr = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+    # The app kept img_pil, the model input and the RGB display copy alive
+    return img_pil, img, cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
+
+def bgr_pipeline(data):
+    return decode_image(data)
+
+def reduced_pipeline(data):
+    return decode_image(data, MODEL_IMGSZ)
+
+PIPELINES = {
+    "pil-rgb-bgr-rgb": legacy_pipeline,
+    "imdecode-bgr": bgr_pipeline,
+    "imdecode-reduced": reduced_pipeline,
+}
+
+def _status_kb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+def _peak_rss_child(name, path, results):
+    with open(path, "rb") as f:
+        data = f.read()
+
+    # Load cv2 now and reset the kernel's high-water mark, so import-time peaks do not count
+    cv2.IMREAD_COLOR
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+    before = _status_kb("VmRSS")
+    kept = PIPELINES[name](data)
+    results.put((_status_kb("VmHWM") - before) / 1024)
+    del kept
+
+def peak_rss_mb(name, path):
+    # Fresh process per measurement (Linux only: reads /proc/self)
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    child = ctx.Process(target=_peak_rss_child, args=(name, path, results))
+    child.start()
+    peak = results.get()
+    child.join()
+    return peak
+
+def decode_ms(name, path, repeats):
+    with open(path, "rb") as f:
+        data = f.read()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        PIPELINES[name](data)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare peak memory and time of image decode pipelines.")
+    parser.add_argument("images", nargs="+", help="image files")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'image':<32}{'pipeline':<20}{'peak MB':>9}{'ms':>9}")
+    for path in args.images:
+        for name in PIPELINES:
+            print(f"{path[-31:]:<32}{name:<20}{peak_rss_mb(name, path):>9.1f}"
+                  f"{decode_ms(name, path, args.repeats):>9.1f}")
+
+if __name__ == "__main__":
+    sys.exit(main())
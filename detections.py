@@ -0,0 +1,72 @@
+import struct
+import numpy as np
+
+# =========================================================
+# COMPACT DETECTION RESULTS
+# Columnar, per image: xyxy float32 (N, 4), class uint8, conf float16,
+# plus the size of the image the boxes refer to. About 19 bytes per box,
+# shared by the inference worker, the detection cache and exports
+# instead of holding on to Ultralytics Results objects.
+# =========================================================
+_HEADER = struct.Struct("<4sBIII")
+_MAGIC = b"SDET"
+_VERSION = 1
+
+class Detections:
+    __slots__ = ("xyxy", "cls", "conf", "width", "height")
+
+    def __init__(self, xyxy, cls, conf, width, height):
+        self.xyxy = np.ascontiguousarray(xyxy, np.float32).reshape(-1, 4)
+        self.cls = np.ascontiguousarray(cls, np.uint8)
+        self.conf = np.ascontiguousarray(conf, np.float16)
+        self.width = int(width)
+        self.height = int(height)
+
+    @classmethod
+    def empty(cls, width, height):
+        return cls(np.zeros((0, 4)), np.zeros(0), np.zeros(0), width, height)
+
+    @classmethod
+    def concatenate(cls, parts, width, height):
+        if not parts:
+            return cls.empty(width, height)
+        return cls(
+            np.concatenate([p.xyxy for p in parts]),
+            np.concatenate([p.cls for p in parts]),
+            np.concatenate([p.conf for p in parts]),
+            width, height
+        )
+
+    def __len__(self):
+        return len(self.cls)
+
+    def __getitem__(self, index):
+        # Boolean mask or index array -> Detections for the same image
+        return Detections(self.xyxy[index], self.cls[index], self.conf[index], self.width, self.height)
+
+    def __repr__(self):
+        return f"Detections({len(self)} boxes, {self.width}x{self.height})"
+
+    def to_bytes(self):
+        return b"".join((
+            _HEADER.pack(_MAGIC, _VERSION, self.width, self.height, len(self)),
+            self.xyxy.tobytes(), self.cls.tobytes(), self.conf.tobytes()
+        ))
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, width, height, n = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not a serialized Detections payload")
+
+        offset = _HEADER.size
+        xyxy = np.frombuffer(data, np.float32, n * 4, offset)
+        offset += xyxy.nbytes
+        classes = np.frombuffer(data, np.uint8, n, offset)
+        offset += classes.nbytes
+        conf = np.frombuffer(data, np.float16, n, offset)
+        return cls(xyxy, classes, conf, width, height)
+
+    def __reduce__(self):
+        # Pickled (e.g. across the worker queue) as the compact byte form
+        return Detections.from_bytes, (self.to_bytes(),)
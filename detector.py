@@ -0,0 +1,359 @@
+import numpy as np
+import json
+import logging
+import os
+import hashlib
+import shutil
+import time
+
+from config import (
+    MAX_TILES, TILE_BATCH, TILE_OVERLAP, TILE_SIZE, TILED_INFERENCE, WARMUP_SIZES
+)
+from detections import Detections
+from lazy import lazy_module
+from model_artifacts import ensure_artifact, file_sha256
+
+# Imported on first use: ultralytics pulls in torch
+ultralytics = lazy_module("ultralytics")
+cv2 = lazy_module("cv2")
+
+logger = logging.getLogger(__name__)
+
+# =========================================================
+# CLASS COLORS
+# =========================================================
+CLASS_COLORS = {
+    "bacteria": {"bgr": (0, 0, 255)},
+    "milk_residues": {"bgr": (0, 255, 0)},
+    "debries": {"bgr": (255, 0, 0)}
+}
+
+# =========================================================
+# MODEL ARTIFACTS (GOOGLE DRIVE SINGLE FILE + LOCAL EXPORTS)
+# =========================================================
+GDRIVE_FILE_ID = "1wYIHhpl_aCHKui3yMo-7I8kqucmUtED2"
+MODEL_NAME = "Yolov11_BacteriaDetection.pt"
+MODEL_DIR = "models"
+MODEL_PATH = os.path.join(MODEL_DIR, MODEL_NAME)
+
+CONF_THRESHOLD = 0.25
+IOU_THRESHOLD = 0.5
+# Ultralytics default input size; the weights and exports run at it
+MODEL_IMGSZ = 640
+
+# Exported artifacts live next to the .pt file, e.g. models/Yolov11_BacteriaDetection.onnx
+EXPORT_PATHS = {
+    "onnx": os.path.splitext(MODEL_PATH)[0] + ".onnx",
+    "openvino": os.path.splitext(MODEL_PATH)[0] + "_openvino_model",
+    "openvino_int8": os.path.splitext(MODEL_PATH)[0] + "_int8_openvino_model",
+}
+BACKENDS = ("torch",) + tuple(EXPORT_PATHS)
+
+# Written by quantize.py; the INT8 model is only served if it passed the guardrail
+QUANT_REPORT_NAME = "quantization_report.json"
+
+def download_model():
+    # Verified against model_manifest.json; local copy, model cache, then Google Drive
+    return ensure_artifact(MODEL_NAME, MODEL_DIR, GDRIVE_FILE_ID)
+
+def model_version(backend):
+    # Digest of the artifact actually served + backend, so caches never serve
+    # detections from another model (or from an export of older weights)
+    if backend == "torch":
+        return f"{MODEL_NAME}:{file_sha256(download_model())[:16]}:{backend}"
+    return f"{artifact_version(export_model(backend))}:{backend}"
+
+def artifact_version(path):
+    paths = [path] if os.path.isfile(path) else sorted(
+        os.path.join(path, name) for name in os.listdir(path)
+    )
+    digest = hashlib.sha256("".join(file_sha256(p) for p in paths).encode()).hexdigest()
+    return f"{os.path.basename(os.path.normpath(path))}:{digest[:16]}"
+
+def detect_settings(tiled=None):
+    if tiled is None:
+        tiled = TILED_INFERENCE
+    if not tiled:
+        return "full-frame"
+    return f"tiled:{TILE_SIZE}:{TILE_OVERLAP}:{MAX_TILES}"
+
+def export_source_path(path):
+    # Sidecar next to an export (file or directory) recording the .pt it was built from
+    return os.path.normpath(path) + ".source.json"
+
+def export_source(path):
+    try:
+        with open(export_source_path(path)) as f:
+            return json.load(f).get("source_sha256")
+    except (OSError, ValueError):
+        return None
+
+def record_export_source(path, source_sha256):
+    with open(export_source_path(path), "w") as f:
+        json.dump({"source_sha256": source_sha256}, f)
+
+def export_model(backend):
+    path = EXPORT_PATHS[backend]
+    source_sha256 = file_sha256(download_model())
+    if os.path.exists(path):
+        if export_source(path) == source_sha256:
+            return path
+        if backend == "openvino_int8":
+            raise RuntimeError(f"{path} was not quantized from the current weights; re-run quantize.py")
+        # Exported from other (or unrecorded) weights: rebuild instead of serving stale results
+        logger.warning("Re-exporting %s: it was not built from the current weights", path)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+    if backend == "openvino_int8":
+        raise FileNotFoundError(
+            f"{path} not found; run quantize.py with a folder of calibration images first"
+        )
+
+    # Dynamic axes so one exported file serves batched calls too
+    ultralytics.YOLO(download_model()).export(format=backend, dynamic=True)
+    record_export_source(path, source_sha256)
+    return path
+
+def check_quantized_model(path):
+    report_path = os.path.join(path, QUANT_REPORT_NAME)
+    if not os.path.exists(report_path):
+        raise RuntimeError(f"{path} has no {QUANT_REPORT_NAME}; re-run quantize.py")
+
+    with open(report_path) as f:
+        report = json.load(f)
+    if not report.get("accepted"):
+        raise RuntimeError(
+            f"INT8 model at {path} failed the count-error guardrail, see {report_path}"
+        )
+
+def load_model(backend="torch"):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}, expected one of {BACKENDS}")
+
+    if backend == "torch":
+        return with_labels(ultralytics.YOLO(download_model()))
+
+    path = export_model(backend)
+    if backend == "openvino_int8":
+        check_quantized_model(path)
+    return load_export(path)
+
+def prepare_model(backend):
+    # For multi-process CLIs: fetch / export once in the parent so the workers
+    # do not race on the same files, and fail before any worker is spawned
+    path = download_model()
+    if backend != "torch":
+        path = export_model(backend)
+        if backend == "openvino_int8":
+            check_quantized_model(path)
+    return path
+
+def load_export(path):
+    # Class names travel in the export metadata, so counts keep the same labels.
+    # No guardrail check: quantize.py loads the INT8 model before its report exists.
+    return with_labels(ultralytics.YOLO(path, task="detect"))
+
+def warmup(model, sizes=WARMUP_SIZES, batch_size=2):
+    # Batches of two, like a real sample, through the configured (tiled or not) path
+    start = time.perf_counter()
+    for h, w in sizes:
+        detect_batch([np.zeros((h, w, 3), np.uint8)] * batch_size, model)
+
+    elapsed = time.perf_counter() - start
+    if sizes:
+        logger.info("Model warm-up on %s took %.2f s", sizes, elapsed)
+    return elapsed
+
+def load_cascade_model(path):
+    # Small screening detector for the cascade, e.g. a YOLO11n trained on the same classes
+    if path.endswith(".pt"):
+        return with_labels(ultralytics.YOLO(path))
+    return load_export(path)
+
+def label_table(names):
+    # Class id -> normalized label ("Bacteria " -> "bacteria"), indexable by class id
+    return tuple(names[i].lower().strip() for i in range(len(names)))
+
+def with_labels(model):
+    # Built once at load so counting and drawing never touch model.names per box
+    model.labels = label_table(model.names)
+    return model
+
+# =========================================================
+# YOLO INFERENCE
+# =========================================================
+def result_detections(result):
+    height, width = result.orig_shape[:2]
+    if result.boxes is None:
+        return Detections.empty(width, height)
+
+    return Detections(
+        result.boxes.xyxy.cpu().numpy(),
+        result.boxes.cls.cpu().numpy(),
+        result.boxes.conf.cpu().numpy(),
+        width, height
+    )
+
+def count_labels(cls, labels):
+    # One bincount over class ids instead of a dict update per box
+    tally = np.bincount(np.asarray(cls, dtype=np.intp), minlength=len(labels))
+    counts = {}
+    for label, n in zip(labels, tally.tolist()):
+        if n:
+            counts[label] = counts.get(label, 0) + n
+    return counts
+
+def render(img, detections, labels, max_width=None):
+    # Only called when an image is shown. Draws on a display-sized copy,
+    # so the full-resolution buffer is never copied or modified.
+    h, w = img.shape[:2]
+    if max_width and w > max_width:
+        canvas = cv2.resize(img, (max_width, round(h * max_width / w)), interpolation=cv2.INTER_AREA)
+    else:
+        canvas = img.copy()
+
+    # Boxes are in the pixel space of the image that was detected on, which may
+    # be a reduced-scale decode of the one being drawn
+    scale = canvas.shape[1] / (detections.width or w)
+    colors = [CLASS_COLORS.get(label, {}).get("bgr", (0, 255, 0)) for label in labels]
+    boxes = (detections.xyxy * scale).astype(int).tolist()
+    for (x1, y1, x2, y2), cls_id in zip(boxes, detections.cls.tolist()):
+        cv2.rectangle(canvas, (x1, y1), (x2, y2), colors[cls_id], 2)
+    return canvas
+
+def detect_batch(imgs, model, tiled=None):
+    if tiled is None:
+        tiled = TILED_INFERENCE
+
+    if tiled:
+        return detect_tiled(imgs, model)
+
+    # One forward pass (preprocess + NMS) for all images of a sample
+    results = model(imgs, imgsz=MODEL_IMGSZ, conf=CONF_THRESHOLD, iou=IOU_THRESHOLD)
+    return [result_detections(result) for result in results]
+
+def run_yolo_batch(imgs, model, tiled=None, max_width=None):
+    # imgs are BGR arrays (imaging.decode_image); annotated images come back as BGR
+    return [
+        (count_labels(detections.cls, model.labels), render(img, detections, model.labels, max_width))
+        for img, detections in zip(imgs, detect_batch(imgs, model, tiled))
+    ]
+
+def run_yolo(img, model, tiled=None, max_width=None):
+    return run_yolo_batch([img], model, tiled, max_width)[0]
+
+def count_batch(imgs, model, tiled=None):
+    # Counts-only path for automated gates: the images are never copied or drawn on
+    return [count_labels(detections.cls, model.labels) for detections in detect_batch(imgs, model, tiled)]
+
+# =========================================================
+# TILED (SLICED) INFERENCE FOR HIGH-RESOLUTION CAPTURES
+# =========================================================
+def tile_origins(length, tile_size, stride):
+    if length <= tile_size:
+        return [0]
+    return list(range(0, length - tile_size, stride)) + [length - tile_size]
+
+def make_tiles(img, tile_size=TILE_SIZE, overlap=TILE_OVERLAP, max_tiles=MAX_TILES):
+    h, w = img.shape[:2]
+
+    # Grow the tiles until the grid fits in max_tiles so latency stays bounded
+    while True:
+        stride = max(1, int(tile_size * (1 - overlap)))
+        xs = tile_origins(w, tile_size, stride)
+        ys = tile_origins(h, tile_size, stride)
+        if len(xs) * len(ys) <= max_tiles:
+            break
+        tile_size = int(tile_size * 1.25)
+
+    return [(x, y, img[y:y + tile_size, x:x + tile_size]) for y in ys for x in xs]
+
+def merge_tile_detections(detections, tile_ids, match_thresh=IOU_THRESHOLD, tile_rects=None, block=512):
+    # Cross-tile dedup on intersection-over-smaller-box: a colony cut by a tile
+    # edge yields a partial box that barely overlaps the full one by IoU
+    order = np.argsort(-detections.conf)
+    detections, tile_ids = detections[order], tile_ids[order]
+    xyxy, cls = detections.xyxy, detections.cls
+
+    # Two boxes from different tiles can only overlap inside the tiles' shared strip,
+    # so only boxes reaching into another tile (tile_rects: x1, y1, x2, y2 per tile id) are compared
+    candidates = np.arange(len(detections))
+    if tile_rects is not None and len(detections):
+        reach = (
+            (xyxy[:, None, 0] < tile_rects[None, :, 2]) & (xyxy[:, None, 2] > tile_rects[None, :, 0])
+            & (xyxy[:, None, 1] < tile_rects[None, :, 3]) & (xyxy[:, None, 3] > tile_rects[None, :, 1])
+        )
+        reach[np.arange(len(detections)), tile_ids] = False
+        candidates = np.flatnonzero(reach.any(axis=1))
+
+    # Per class, in row blocks, so memory stays bounded on heavily contaminated images
+    drop = np.zeros(len(detections), bool)
+    for c in np.unique(cls[candidates]):
+        idx = candidates[cls[candidates] == c]
+        boxes, tiles = xyxy[idx], tile_ids[idx]
+        area = np.prod(boxes[:, 2:] - boxes[:, :2], axis=1)
+        for start in range(0, len(idx), block):
+            rows = slice(start, start + block)
+            lt = np.maximum(boxes[rows, None, :2], boxes[None, :, :2])
+            rb = np.minimum(boxes[rows, None, 2:], boxes[None, :, 2:])
+            inter = np.prod(np.clip(rb - lt, 0, None), axis=2)
+            ios = inter / np.maximum(np.minimum(area[rows, None], area[None, :]), 1e-6)
+
+            # Greedy, in confidence order: a box that is kept drops the lower-confidence
+            # boxes it matches from other tiles; a box already dropped suppresses nothing
+            duplicate = (
+                (ios > match_thresh)
+                & (tiles[rows, None] != tiles[None, :])
+                & (np.arange(start, start + len(ios))[:, None] < np.arange(len(idx))[None, :])
+            )
+            for row in np.flatnonzero(duplicate.any(axis=1)):
+                if not drop[idx[start + row]]:
+                    drop[idx[duplicate[row]]] = True
+    return detections[~drop]
+
+def detect_tiled(imgs, model, tile_size=TILE_SIZE, overlap=TILE_OVERLAP,
+                 max_tiles=MAX_TILES, batch_size=TILE_BATCH):
+    tiles = [
+        (i, x, y, crop)
+        for i, img in enumerate(imgs)
+        for x, y, crop in make_tiles(img, tile_size, overlap, max_tiles)
+    ]
+
+    results = []
+    for start in range(0, len(tiles), batch_size):
+        crops = [crop for _, _, _, crop in tiles[start:start + batch_size]]
+        results.extend(model(crops, imgsz=MODEL_IMGSZ, conf=CONF_THRESHOLD, iou=IOU_THRESHOLD))
+
+    # Tile ids and rectangles are per image, for the merge's overlap-strip test
+    parts = [[] for _ in imgs]
+    tile_ids = [[] for _ in imgs]
+    tile_rects = [[] for _ in imgs]
+    for (i, x, y, crop), result in zip(tiles, results):
+        d = result_detections(result)
+        h, w = imgs[i].shape[:2]
+        parts[i].append(Detections(d.xyxy + np.array([x, y, x, y], np.float32), d.cls, d.conf, w, h))
+        tile_ids[i].append(np.full(len(d), len(tile_rects[i])))
+        tile_rects[i].append((x, y, x + crop.shape[1], y + crop.shape[0]))
+
+    return [
+        merge_tile_detections(
+            Detections.concatenate(image_parts, img.shape[1], img.shape[0]),
+            np.concatenate(image_tile_ids), tile_rects=np.array(image_rects, np.float32)
+        )
+        for img, image_parts, image_tile_ids, image_rects in zip(imgs, parts, tile_ids, tile_rects)
+    ]
+
+# =========================================================
+# IMAGE FILES
+# =========================================================
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+def list_images(folder):
+    return sorted(
+        os.path.join(folder, name)
+        for name in os.listdir(folder)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
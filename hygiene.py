@@ -0,0 +1,55 @@
+import numpy as np
+
+# =========================================================
+# HYGIENE VERDICT (FINAL RESULT THRESHOLDS)
+# =========================================================
+# More than this many detections in a sample -> "Surface Is Not Clean"
+CRITICAL_ABOVE = {
+    "bacteria": 15,
+    "milk_residues": 10,
+    "debries": 10
+}
+# Otherwise, at least this many of any class -> "Caution"
+CAUTION_FROM = 5
+
+def sum_counts(counts_list):
+    total_counts = {}
+    for d in counts_list:
+        for k, v in d.items():
+            total_counts[k] = total_counts.get(k, 0) + v
+    return total_counts
+
+def assess(total_counts):
+    if any(total_counts.get(label, 0) > limit for label, limit in CRITICAL_ABOVE.items()):
+        return "critical"
+    if any(total_counts.get(label, 0) >= CAUTION_FROM for label in CRITICAL_ABOVE):
+        return "caution"
+    return "clean"
+
+def bacteria_density(bacteria):
+    bacteria_ml = int(bacteria * 1000)
+    cfu = int(np.round(bacteria_ml / 3))
+    return bacteria_ml, cfu
+
+def near_boundary(total_counts, margin):
+    # True when a class count is within `margin` of a step where the verdict changes
+    # (4 -> 5 for caution, limit -> limit + 1 for critical)
+    for label, limit in CRITICAL_ABOVE.items():
+        count = total_counts.get(label, 0)
+        for boundary in (CAUTION_FROM, limit + 1):
+            if abs(count - (boundary - 0.5)) <= margin:
+                return True
+    return False
+
+def cascade_stage(screening_counts, margin):
+    # Two-stage cascade policy shared by the UI and the API: the screening ("fast")
+    # result stands unless a class count lands near a verdict threshold
+    return "full" if near_boundary(sum_counts(screening_counts), margin) else "fast"
+
+def sample_report(counts_list):
+    # Headless summary of one sample: per-class totals, densities and the verdict
+    total_counts = sum_counts(counts_list)
+    bacteria_ml, cfu = bacteria_density(total_counts.get("bacteria", 0))
+    report = {label: total_counts.get(label, 0) for label in CRITICAL_ABOVE}
+    report.update(bacteria_per_ml=bacteria_ml, cfu_per_ml=cfu, verdict=assess(total_counts))
+    return report
@@ -0,0 +1,73 @@
+import io
+import numpy as np
+from PIL import Image
+
+from lazy import lazy_module
+
+cv2 = lazy_module("cv2")
+
+# =========================================================
+# IMAGE DECODING
+# Uploads are decoded once, straight from their bytes into a BGR
+# buffer (OpenCV's bundled libjpeg-turbo for JPEG). That one buffer
+# feeds the model, the annotation and the display. When only the model
+# input size is needed, JPEGs are decoded at a reduced scale.
+# =========================================================
+# JPEG DCT scaling: libjpeg decodes straight to 1/2, 1/4 or 1/8 size
+# (flag names, resolved on use so importing this module does not load cv2)
+REDUCED_DECODE_FLAGS = {
+    2: "IMREAD_REDUCED_COLOR_2",
+    4: "IMREAD_REDUCED_COLOR_4",
+    8: "IMREAD_REDUCED_COLOR_8",
+}
+
+def jpeg_scale(data, min_size):
+    # Largest scale-down whose long side still covers min_size (e.g. the model input)
+    if not data.startswith(b"\xff\xd8"):
+        return 1
+
+    # PIL only parses the header here, the pixels are never decoded. A corrupt
+    # header decodes at full scale, where OpenCV reports it as a ValueError.
+    try:
+        long_side = max(Image.open(io.BytesIO(data)).size)
+    except (OSError, SyntaxError):
+        return 1
+    for factor in (8, 4, 2):
+        if long_side // factor >= min_size:
+            return factor
+    return 1
+
+def decode_image(data, min_size=None):
+    # min_size=None keeps full resolution (tiled inference, full-resolution display)
+    if not data:
+        raise ValueError("Empty image data")
+    flag = cv2.IMREAD_COLOR
+    if min_size:
+        flag = getattr(cv2, REDUCED_DECODE_FLAGS.get(jpeg_scale(data, min_size), "IMREAD_COLOR"))
+
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+    if img is None:
+        raise ValueError("Could not decode image data")
+    return img
+
+def read_image(path, min_size=None):
+    with open(path, "rb") as f:
+        return decode_image(f.read(), min_size)
+
+# =========================================================
+# IMAGE ENCODING (DISPLAY)
+# Annotated images go to the browser as compressed bytes, encoded
+# straight from the BGR buffer, instead of raw arrays Streamlit
+# would re-encode on every rerun.
+# =========================================================
+ENCODE_PARAMS = {
+    "jpeg": (".jpg", "IMWRITE_JPEG_QUALITY"),
+    "webp": (".webp", "IMWRITE_WEBP_QUALITY"),
+}
+
+def encode_image(img, fmt="jpeg", quality=80):
+    ext, quality_flag = ENCODE_PARAMS[fmt]
+    ok, buf = cv2.imencode(ext, img, [getattr(cv2, quality_flag), quality])
+    if not ok:
+        raise ValueError(f"Could not encode image as {fmt}")
+    return buf.tobytes()
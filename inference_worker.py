@@ -0,0 +1,249 @@
+from concurrent.futures import Future, InvalidStateError, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import queue
+import sys
+import threading
+import time
+
+from scheduler import SchedulerMetrics, collect_batch, queue_depth
+
+logger = logging.getLogger(__name__)
+
+# Startup progress reported to the UI as (step, STARTUP_STEPS, message)
+STARTUP_STEPS = 4
+
+# =========================================================
+# SHARED INFERENCE WORKER
+# One long-lived process owns the model; every Streamlit session
+# submits images over a queue and waits on a Future, so inference
+# never runs on (or contends with) the script threads. Requests that
+# arrive within the batching window share one forward pass.
+# =========================================================
+def _run_batch(batch, models, responses):
+    from detector import detect_batch
+
+    # Requests only share a forward pass with the same model and tiling mode
+    for options in {request[2] for request in batch}:
+        model_key, tiled = options
+        group = [request for request in batch if request[2] == options]
+        imgs = [img for _, request_imgs, _, _ in group for img in request_imgs]
+        try:
+            detections = detect_batch(imgs, models[model_key], tiled)
+        except Exception as exc:
+            for request_id, _, _, _ in group:
+                responses.put((request_id, None, f"{type(exc).__name__}: {exc}"))
+            continue
+
+        offset = 0
+        for request_id, imgs, _, _ in group:
+            responses.put((request_id, detections[offset:offset + len(imgs)], None))
+            offset += len(imgs)
+
+def _report(responses, step, message):
+    responses.put(("status", (step, STARTUP_STEPS, message), None))
+
+def _serve(backend, requests, responses, window_s, max_images, cascade_model):
+    # Runs in the worker process; heavy imports stay out of the UI process
+    from detector import (
+        MODEL_PATH, artifact_version, download_model, load_cascade_model, load_model,
+        model_version, warmup
+    )
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    try:
+        if os.path.exists(MODEL_PATH):
+            _report(responses, 1, "Verifying AI model weights...")
+        else:
+            _report(responses, 1, "Fetching AI model (local cache or Google Drive)...")
+        download_model()
+
+        # Non-torch backends export the weights on first use
+        _report(responses, 2, "Loading AI model...")
+        models = {"full": load_model(backend)}
+        versions = {"full": model_version(backend)}
+        if cascade_model:
+            models["fast"] = load_cascade_model(cascade_model)
+            versions["fast"] = artifact_version(cascade_model)
+
+        # Before "ready": queued samples only reach warm models
+        _report(responses, 3, "Warming up AI model...")
+        for model in models.values():
+            warmup(model)
+        labels = {key: model.labels for key, model in models.items()}
+        responses.put(("ready", (labels, versions), None))
+    except Exception as exc:
+        responses.put(("ready", None, f"{type(exc).__name__}: {exc}"))
+        return
+
+    metrics = SchedulerMetrics()
+    while True:
+        batch, stop = collect_batch(requests, window_s, max_images)
+        if batch:
+            started = time.time()
+            _run_batch(batch, models, responses)
+            metrics.record(batch, started, time.time(), queue_depth(requests))
+            responses.put(("metrics", metrics.snapshot(), None))
+        if stop:
+            break
+
+@contextmanager
+def _main_script_hidden():
+    # Streamlit runs the app as __main__; a spawned child would re-run the whole script
+    main = sys.modules.get("__main__")
+    path = getattr(main, "__file__", None)
+    if path:
+        del main.__file__
+    try:
+        yield
+    finally:
+        if path:
+            main.__file__ = path
+
+class InferenceWorker:
+    def __init__(self, backend="torch", batch_window_ms=20, max_batch_size=8, cascade_model=""):
+        # spawn: the UI process runs threads, forking it under torch is unsafe
+        ctx = mp.get_context("spawn")
+        self._requests = ctx.Queue()
+        self._responses = ctx.Queue()
+        self._process = ctx.Process(
+            target=_serve,
+            args=(
+                backend, self._requests, self._responses,
+                batch_window_ms / 1000, max_batch_size, cascade_model
+            ),
+            daemon=True
+        )
+        with _main_script_hidden():
+            self._process.start()
+
+        # Per model key: "full", plus "fast" when a cascade model is configured
+        self.model_labels = {}
+        self.model_versions = {}
+        self.metrics = {}
+        self.status = (0, STARTUP_STEPS, "Starting inference worker...")
+        self._error = None
+        self.failed_at = None
+        self._ready = threading.Event()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+
+        threading.Thread(target=self._read_responses, daemon=True).start()
+
+    @property
+    def labels(self):
+        return self.model_labels.get("full")
+
+    @property
+    def version(self):
+        return self.model_versions.get("full")
+
+    @property
+    def ready(self):
+        return self._ready.is_set() and self._error is None
+
+    @property
+    def error(self):
+        return self._error
+
+    def wait_ready(self, timeout=None):
+        if not self._ready.wait(timeout):
+            raise TimeoutError("Inference worker did not load the model in time")
+        if self._error:
+            raise RuntimeError(f"Inference worker failed to start: {self._error}")
+
+    def submit(self, imgs, tiled=None, model="full"):
+        future = Future()
+        with self._lock:
+            if self._error:
+                future.set_exception(RuntimeError(self._error))
+                return future
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+        # A caller that gives up (timeout, cancelled asyncio wrapper) stops waiting for the reply
+        future.add_done_callback(lambda f: f.cancelled() and self._discard(request_id))
+        self._requests.put((request_id, list(imgs), (model, tiled), time.time()))
+        return future
+
+    def detect_batch(self, imgs, tiled=None, timeout=None, model="full"):
+        future = self.submit(imgs, tiled, model)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise
+
+    def close(self):
+        self._requests.put(None)
+        self._process.join(timeout=5)
+
+    def _discard(self, request_id):
+        with self._lock:
+            self._pending.pop(request_id, None)
+
+    def _read_responses(self):
+        # The only thread that resolves futures: if it dies, every caller would hang
+        try:
+            self._route_responses()
+        except Exception as exc:
+            logger.exception("Inference response reader failed")
+            self._fail_all(f"Response reader failed: {type(exc).__name__}: {exc}")
+
+    def _route_responses(self):
+        while True:
+            try:
+                request_id, result, error = self._responses.get(timeout=1)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    self._fail_all(f"Inference worker exited with code {self._process.exitcode}")
+                    return
+                continue
+
+            if request_id == "ready":
+                if error:
+                    self._fail_all(error)
+                    return
+                self.model_labels, self.model_versions = result
+                self.status = (STARTUP_STEPS, STARTUP_STEPS, "AI model ready")
+                self._ready.set()
+                continue
+
+            if request_id == "status":
+                self.status = result
+                logger.info("inference worker: %s", result[2])
+                continue
+
+            if request_id == "metrics":
+                self.metrics = result
+                logger.debug("inference scheduler: %s", result)
+                continue
+
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+            if future is not None:
+                _resolve(future, result, error)
+
+    def _fail_all(self, error):
+        with self._lock:
+            self._error = error
+            self.failed_at = time.time()
+            pending, self._pending = self._pending, {}
+        self._ready.set()
+        for future in pending.values():
+            _resolve(future, None, error)
+
+def _resolve(future, result, error):
+    # The caller may have cancelled (timed out) while the reply was on its way
+    if future.done():
+        return
+    try:
+        if error:
+            future.set_exception(RuntimeError(error))
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
@@ -0,0 +1,27 @@
+import importlib
+
+# =========================================================
+# LAZY IMPORTS
+# Heavy modules (ultralytics -> torch, cv2, gdown) are bound at the top
+# of a module as usual but only imported on first attribute access, so
+# the page reaches the browser before they are paid for.
+#   cv2 = lazy_module("cv2")
+# Check what the UI process still imports with: python startup_report.py
+# =========================================================
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        # Only called for names not found on the proxy itself
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+def lazy_module(name):
+    return LazyModule(name)
@@ -0,0 +1,140 @@
+import argparse
+from collections import namedtuple
+import time
+import numpy as np
+
+from config import LIVE_CHANGE_THRESHOLD, LIVE_TARGET_FPS, MODEL_BACKEND
+from detector import BACKENDS, count_labels, detect_batch, load_model, render
+from lazy import lazy_module
+
+cv2 = lazy_module("cv2")
+
+# =========================================================
+# LIVE STREAM INSPECTION (BORESCOPE VIDEO / CAMERA)
+# Frames are paced to a target processing FPS: when the source is
+# faster than we can (or want to) process, whole frames are skipped with
+# grab(), which never decodes them. A decoded frame only reaches the
+# model if its 64 px grayscale thumbnail differs enough from the last
+# frame that did; otherwise the previous counts stand.
+#   python live_stream.py borescope.mp4 --target-fps 5
+#   python live_stream.py 0                  # first local camera
+# =========================================================
+StreamUpdate = namedtuple("StreamUpdate", "frame_index counts image inferred stride fps")
+
+class ChangeDetector:
+    def __init__(self, threshold=LIVE_CHANGE_THRESHOLD, width=64):
+        # threshold: mean absolute difference of thumbnail pixels (0-255)
+        self.threshold = threshold
+        self.width = width
+        self._reference = None
+
+    def thumbnail(self, frame):
+        h, w = frame.shape[:2]
+        small = cv2.resize(frame, (self.width, max(1, round(h * self.width / w))), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+    def check(self, frame):
+        # True (and the frame becomes the new reference) when it should be re-detected
+        thumb = self.thumbnail(frame)
+        if self._reference is not None and thumb.shape == self._reference.shape:
+            if np.abs(thumb - self._reference).mean() <= self.threshold:
+                return False
+        self._reference = thumb
+        return True
+
+class FramePacer:
+    def __init__(self, target_fps=LIVE_TARGET_FPS, source_fps=None, smoothing=0.2):
+        self.target_fps = target_fps
+        # Cameras often report 0 fps; then only our own processing cost drives the stride
+        self.source_fps = source_fps or target_fps
+        self.smoothing = smoothing
+        self.cost = None
+        self.fps = 0.0
+        self._last = None
+
+    def record(self, seconds):
+        # Moving average of the time one decoded frame takes (change check + inference)
+        self.cost = seconds if self.cost is None else self.cost + self.smoothing * (seconds - self.cost)
+
+    @property
+    def stride(self):
+        fps = self.target_fps if not self.cost else min(self.target_fps, 1 / self.cost)
+        return max(1, round(self.source_fps / fps))
+
+    def wait(self):
+        # Never process faster than the target; also tracks the achieved rate
+        now = time.perf_counter()
+        if self._last is not None:
+            delay = 1 / self.target_fps - (now - self._last)
+            if delay > 0:
+                time.sleep(delay)
+                now = time.perf_counter()
+            interval = now - self._last
+            self.fps = 1 / interval if not self.fps else self.fps + self.smoothing * (1 / interval - self.fps)
+        self._last = now
+
+def open_source(source):
+    # "0", "1", ... are local cameras, anything else a file or stream URL
+    cap = cv2.VideoCapture(int(source) if str(source).isdigit() else source)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video source {source!r}")
+    return cap
+
+def stream_counts(source, detect, labels, target_fps=LIVE_TARGET_FPS, threshold=LIVE_CHANGE_THRESHOLD,
+                  loop=False, max_width=None, annotate=True):
+    # detect(frame) -> Detections; in the app it goes through the shared inference worker
+    cap = open_source(source)
+    pacer = FramePacer(target_fps, cap.get(cv2.CAP_PROP_FPS))
+    changes = ChangeDetector(threshold)
+    counts, image, frame_index = {}, None, -1
+    try:
+        while True:
+            pacer.wait()
+            for _ in range(pacer.stride - 1):
+                if not cap.grab():
+                    break
+                frame_index += 1
+
+            ok, frame = cap.read()
+            if not ok:
+                # A looped video file stands in for a live camera
+                if loop and frame_index > 0 and cap.set(cv2.CAP_PROP_POS_FRAMES, 0):
+                    continue
+                return
+            frame_index += 1
+
+            start = time.perf_counter()
+            inferred = changes.check(frame)
+            if inferred:
+                detections = detect(frame)
+                counts = count_labels(detections.cls, labels)
+                if annotate:
+                    image = render(frame, detections, labels, max_width)
+            pacer.record(time.perf_counter() - start)
+            yield StreamUpdate(frame_index, counts, image, inferred, pacer.stride, pacer.fps)
+    finally:
+        cap.release()
+
+def main():
+    parser = argparse.ArgumentParser(description="Live per-class counts from a video file or camera.")
+    parser.add_argument("source", help="video file, stream URL or camera index")
+    parser.add_argument("--backend", default=MODEL_BACKEND, choices=BACKENDS)
+    parser.add_argument("--target-fps", type=float, default=LIVE_TARGET_FPS)
+    parser.add_argument("--threshold", type=float, default=LIVE_CHANGE_THRESHOLD)
+    parser.add_argument("--loop", action="store_true", help="restart a video file at its end")
+    args = parser.parse_args()
+
+    model = load_model(args.backend)
+    updates = stream_counts(
+        args.source, lambda frame: detect_batch([frame], model)[0], model.labels,
+        args.target_fps, args.threshold, args.loop, annotate=False
+    )
+    inferred = 0
+    for update in updates:
+        inferred += update.inferred
+        print(f"frame {update.frame_index:>6}  {'detect' if update.inferred else 'same  '}  "
+              f"stride {update.stride:>3}  {update.fps:5.1f} fps  {update.counts}", flush=True)
+    print(f"{inferred} frames sent to the model")
+
+if __name__ == "__main__":
+    main()
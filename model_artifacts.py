@@ -0,0 +1,187 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import zipfile
+
+from config import MODEL_CACHE_DIR, OFFLINE
+from lazy import lazy_module
+
+gdown = lazy_module("gdown")
+
+logger = logging.getLogger(__name__)
+
+# =========================================================
+# MODEL ARTIFACT MANAGER
+# Weights are only used once they match model_manifest.json (size +
+# SHA-256). Lookup order: the local copy, a pre-seeded cache directory
+# (SOMAEYE_MODEL_CACHE, e.g. a read-only mount on air-gapped servers),
+# then Google Drive unless SOMAEYE_OFFLINE is set. Offline mode fails
+# closed: weights without a pinned SHA-256 are refused. Downloads land in
+# a staging directory, resume after interruption and are renamed into
+# place only once verified, so a partial file is never picked up. Local
+# weights that fail verification are renamed to *.rejected, never deleted.
+#   python model_artifacts.py verify
+#   python model_artifacts.py pin            # record the current weights
+#   python model_artifacts.py fetch /mnt/model-cache
+# =========================================================
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_manifest.json")
+STAGING_DIR_NAME = ".partial"
+REJECTED_SUFFIX = ".rejected"
+
+# (path, size, mtime) -> digest, so repeated checks of an unchanged file hash it once
+_digests = {}
+_unpinned_warned = set()
+
+def file_sha256(path):
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _digests:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        _digests[memo_key] = digest.hexdigest()
+    return _digests[memo_key]
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+def verify_artifact(path, expected):
+    # Returns None when the file is good, otherwise the reason it is not
+    size = os.path.getsize(path)
+    if expected.get("size") is not None and size != expected["size"]:
+        return f"size {size} != expected {expected['size']}"
+    if expected.get("sha256"):
+        digest = file_sha256(path)
+        if digest != expected["sha256"]:
+            return f"sha256 {digest[:16]}... != expected {expected['sha256'][:16]}..."
+        return None
+
+    # Not pinned yet: at least reject truncated checkpoints (.pt files are zip archives)
+    if path.endswith(".pt") and not zipfile.is_zipfile(path):
+        return "not a complete PyTorch checkpoint"
+    return None
+
+def _install(src, dest):
+    # Copy next to the destination, then rename: readers see the old file or the whole new one
+    tmp_path = dest + ".tmp"
+    shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dest)
+
+def ensure_artifact(name, dest_dir, gdrive_id, manifest=None, cache_dir=MODEL_CACHE_DIR, offline=OFFLINE):
+    if manifest is None:
+        manifest = load_manifest()
+    expected = manifest.get(name, {})
+    if offline and not expected.get("sha256"):
+        # Air-gapped sites only run weights whose digest was pinned on a trusted machine
+        raise RuntimeError(
+            f"{name} has no pinned sha256 in {MANIFEST_PATH} and SOMAEYE_OFFLINE is set; "
+            f"run model_artifacts.py pin on a verified copy first"
+        )
+    if not expected.get("sha256") and name not in _unpinned_warned:
+        _unpinned_warned.add(name)
+        logger.warning("%s has no pinned sha256 in %s; run model_artifacts.py pin", name, MANIFEST_PATH)
+
+    os.makedirs(dest_dir, exist_ok=True)
+    dest = os.path.join(dest_dir, name)
+
+    if os.path.exists(dest):
+        problem = verify_artifact(dest, expected)
+        if problem is None:
+            return dest
+        # Set aside, not deleted: it may be the only copy on an air-gapped server
+        rejected = dest + REJECTED_SUFFIX
+        logger.warning("Moving %s to %s: %s", dest, rejected, problem)
+        os.replace(dest, rejected)
+
+    if cache_dir:
+        cached = os.path.join(cache_dir, name)
+        if os.path.exists(cached):
+            problem = verify_artifact(cached, expected)
+            if problem is None:
+                logger.info("Installing %s from the local model cache %s", name, cache_dir)
+                _install(cached, dest)
+                return dest
+            logger.warning("Ignoring cached %s: %s", cached, problem)
+
+    if offline:
+        hint = ""
+        if os.path.exists(dest + REJECTED_SUFFIX):
+            hint = f" ({dest + REJECTED_SUFFIX} does not match the manifest)"
+        raise FileNotFoundError(
+            f"{name} is not available locally and SOMAEYE_OFFLINE is set; "
+            f"copy it into {dest_dir} or the model cache directory{hint}"
+        )
+
+    # gdown keeps its partial file in the staging directory and resumes from it
+    staging_dir = os.path.join(dest_dir, STAGING_DIR_NAME)
+    os.makedirs(staging_dir, exist_ok=True)
+    staged = os.path.join(staging_dir, name)
+    if not gdown.download(id=gdrive_id, output=staged, quiet=False, resume=True):
+        raise RuntimeError(f"Download of {name} from Google Drive failed")
+
+    problem = verify_artifact(staged, expected)
+    if problem is not None:
+        os.remove(staged)
+        raise RuntimeError(f"Downloaded {name} failed verification: {problem}")
+
+    os.replace(staged, dest)
+    logger.info("Downloaded and verified %s (version %s)", name, expected.get("version", "unpinned"))
+    return dest
+
+def main():
+    # Weights location comes from the detector; imported here to keep the module import light
+    from detector import GDRIVE_FILE_ID, MODEL_NAME, MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Verify, pin or pre-fetch the model weights.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("verify", help="check the local weights against the manifest")
+    pin = sub.add_parser("pin", help="record the local weights' size and sha256 in the manifest")
+    pin.add_argument("--version", help="version label to store with the pin")
+    fetch = sub.add_parser("fetch", help="download and verify the weights into a directory")
+    fetch.add_argument("directory", help="e.g. the SOMAEYE_MODEL_CACHE directory to pre-seed")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    manifest = load_manifest()
+
+    if args.command == "verify":
+        if not os.path.exists(MODEL_PATH):
+            sys.exit(f"{MODEL_PATH} not found")
+        problem = verify_artifact(MODEL_PATH, manifest.get(MODEL_NAME, {}))
+        if problem is not None:
+            sys.exit(f"{MODEL_PATH}: {problem}")
+        print(f"{MODEL_PATH}: OK")
+
+    elif args.command == "pin":
+        if not os.path.exists(MODEL_PATH):
+            sys.exit(f"{MODEL_PATH} not found")
+        entry = manifest.setdefault(MODEL_NAME, {})
+        entry.update(size=os.path.getsize(MODEL_PATH), sha256=file_sha256(MODEL_PATH))
+        if args.version:
+            entry["version"] = args.version
+        save_manifest(manifest)
+        print(f"Pinned {MODEL_NAME}: {entry['sha256']} ({entry['size']} bytes)")
+
+    else:
+        path = ensure_artifact(
+            MODEL_NAME, args.directory, GDRIVE_FILE_ID, manifest, cache_dir="", offline=False
+        )
+        print(f"{path}: OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import argparse
+import sys
+
+from detector import BACKENDS, list_images, load_model, run_yolo
+from imaging import read_image
+
+# =========================================================
+# BACKEND PARITY CHECK
+# Runs every fixture image through the PyTorch reference and
+# a candidate backend; exits non-zero if any per-class count differs.
+#   python parity.py fixtures/ --backend onnx
+# =========================================================
+def check_parity(paths, reference, candidate):
+    mismatches = []
+    for path in paths:
+        img = read_image(path)
+        expected, _ = run_yolo(img, reference)
+        actual, _ = run_yolo(img, candidate)
+        if expected != actual:
+            mismatches.append((path, expected, actual))
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-class counts of a backend against PyTorch.")
+    parser.add_argument("fixtures", help="folder of fixture images")
+    parser.add_argument("--backend", default="onnx", choices=[b for b in BACKENDS if b != "torch"])
+    args = parser.parse_args()
+
+    paths = list_images(args.fixtures)
+    if not paths:
+        sys.exit(f"No images found in {args.fixtures}")
+
+    mismatches = check_parity(paths, load_model("torch"), load_model(args.backend))
+    for path, expected, actual in mismatches:
+        print(f"MISMATCH {path}: torch={expected} {args.backend}={actual}")
+
+    print(f"{len(paths) - len(mismatches)}/{len(paths)} images match ({args.backend} vs torch)")
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import yaml
+
+from benchmark import time_backend
+from detector import (
+    EXPORT_PATHS, QUANT_REPORT_NAME, download_model, file_sha256, list_images,
+    load_export, load_model, record_export_source, run_yolo
+)
+from imaging import read_image
+from lazy import lazy_module
+
+ultralytics = lazy_module("ultralytics")
+
+# =========================================================
+# INT8 POST-TRAINING QUANTIZATION
+# Calibrates an OpenVINO INT8 model on local CIP images, then compares
+# per-class counts and latency against the FP32 PyTorch model.
+#   python quantize.py calibration_images/ --eval eval_images/
+# =========================================================
+def export_int8(calib_folder, fraction):
+    names = ultralytics.YOLO(download_model()).names
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Unlabelled calibration set: the same folder serves as train and val
+        data_yaml = os.path.join(tmp, "calibration.yaml")
+        with open(data_yaml, "w") as f:
+            yaml.safe_dump({
+                "path": os.path.abspath(calib_folder),
+                "train": ".",
+                "val": ".",
+                "names": names,
+            }, f)
+
+        return ultralytics.YOLO(download_model()).export(
+            format="openvino", int8=True, dynamic=True, data=data_yaml, fraction=fraction
+        )
+
+def compare_counts(imgs, fp32_model, int8_model):
+    per_image = []
+    for img in imgs:
+        fp32_counts, _ = run_yolo(img, fp32_model)
+        int8_counts, _ = run_yolo(img, int8_model)
+        per_image.append({"fp32": fp32_counts, "int8": int8_counts})
+
+    labels = sorted({label for counts in per_image for d in counts.values() for label in d})
+    per_class = {}
+    for label in labels:
+        errors = [c["int8"].get(label, 0) - c["fp32"].get(label, 0) for c in per_image]
+        per_class[label] = {
+            "mean_abs_error": statistics.mean(abs(e) for e in errors),
+            "max_abs_error": max(abs(e) for e in errors),
+            "bias": statistics.mean(errors),
+        }
+    return per_class, per_image
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and validate an INT8 OpenVINO bacteria detector.")
+    parser.add_argument("calibration", help="folder of representative CIP images")
+    parser.add_argument("--eval", required=True,
+                        help="held-out folder for the FP32 comparison (not the calibration images)")
+    parser.add_argument("--fraction", type=float, default=1.0, help="share of calibration images to use")
+    parser.add_argument("--max-mean-abs-error", type=float, default=0.5,
+                        help="largest per-class mean absolute count error accepted")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    calib_paths = list_images(args.calibration)
+    eval_paths = list_images(args.eval)
+    if not calib_paths or not eval_paths:
+        sys.exit("Calibration and evaluation folders must contain images")
+    # The guardrail must be measured on images the quantizer never saw
+    shared = {os.path.realpath(p) for p in calib_paths} & {os.path.realpath(p) for p in eval_paths}
+    if shared:
+        sys.exit(f"{len(shared)} evaluation image(s) are also calibration images; use a held-out --eval folder")
+
+    int8_path = EXPORT_PATHS["openvino_int8"]
+    if os.path.exists(int8_path):
+        shutil.rmtree(int8_path)
+    int8_path = export_int8(args.calibration, args.fraction)
+    record_export_source(int8_path, file_sha256(download_model()))
+
+    # Load directly: load_model("openvino_int8") refuses until the report exists
+    fp32_model = load_model("torch")
+    int8_model = load_export(int8_path)
+    imgs = [read_image(path) for path in eval_paths]
+
+    per_class, per_image = compare_counts(imgs, fp32_model, int8_model)
+    fp32_ms = statistics.mean(time_backend(fp32_model, imgs, args.repeats))
+    int8_ms = statistics.mean(time_backend(int8_model, imgs, args.repeats))
+    worst = max((c["mean_abs_error"] for c in per_class.values()), default=0.0)
+
+    report = {
+        "accepted": worst <= args.max_mean_abs_error,
+        "max_mean_abs_error": args.max_mean_abs_error,
+        "calibration_folder": os.path.abspath(args.calibration),
+        "eval_folder": os.path.abspath(args.eval),
+        "eval_images": len(imgs),
+        "per_class": per_class,
+        "latency_ms": {"fp32": fp32_ms, "int8": int8_ms, "speedup": fp32_ms / int8_ms},
+        "per_image": dict(zip(eval_paths, per_image)),
+    }
+    report_path = os.path.join(int8_path, QUANT_REPORT_NAME)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for label, c in per_class.items():
+        print(f"{label:<15} MAE {c['mean_abs_error']:.2f}  max {c['max_abs_error']}  bias {c['bias']:+.2f}")
+    print(f"latency fp32 {fp32_ms:.1f} ms  int8 {int8_ms:.1f} ms  ({fp32_ms / int8_ms:.2f}x)")
+    print(f"{'ACCEPTED' if report['accepted'] else 'REJECTED'} - report written to {report_path}")
+    sys.exit(0 if report["accepted"] else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+
+from detections import Detections
+
+# =========================================================
+# DETECTION RESULT CACHE
+# Keyed on the uploaded bytes + model version + inference settings,
+# so Streamlit reruns on the same sample never re-run the model.
+# Bounded in-memory LRU of Detections, optionally backed by a directory
+# of their serialized bytes.
+# =========================================================
+def cache_key(data, model_version, conf, iou, settings=""):
+    digest = hashlib.sha256(data).hexdigest()
+    params = hashlib.sha256(f"{model_version}|{conf}|{iou}|{settings}".encode()).hexdigest()
+    return f"{digest[:32]}-{params[:16]}"
+
+class LRUCache:
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class DetectionCache(LRUCache):
+    def __init__(self, max_entries=64, disk_dir=None):
+        super().__init__(max_entries)
+        self.disk_dir = disk_dir
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def get(self, key):
+        detections = super().get(key)
+        if detections is None:
+            detections = self._read_disk(key)
+            if detections is not None:
+                super().put(key, detections)
+        return detections
+
+    def put(self, key, detections):
+        super().put(key, detections)
+        self._write_disk(key, detections)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.det")
+
+    def _read_disk(self, key):
+        if not self.disk_dir or not os.path.exists(self._disk_path(key)):
+            return None
+
+        with open(self._disk_path(key), "rb") as f:
+            return Detections.from_bytes(f.read())
+
+    def _write_disk(self, key, detections):
+        if not self.disk_dir:
+            return
+
+        # Write then rename, so a crash never leaves a truncated entry behind
+        tmp_path = self._disk_path(key) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(detections.to_bytes())
+        os.replace(tmp_path, self._disk_path(key))
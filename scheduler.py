@@ -0,0 +1,77 @@
+from collections import deque
+import queue
+import statistics
+import time
+
+# =========================================================
+# CROSS-SESSION MICRO-BATCHING
+# The inference worker waits up to a short window after the first
+# pending request, gathering requests from every session until the
+# batch is full, then runs them through the model in one forward pass.
+# =========================================================
+def collect_batch(requests, window_s, max_images):
+    first = requests.get()
+    if first is None:
+        return [], True
+
+    batch = [first]
+    n_images = len(first[1])
+    deadline = time.monotonic() + window_s
+    while n_images < max_images:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            request = requests.get(timeout=remaining)
+        except queue.Empty:
+            break
+        if request is None:
+            return batch, True
+        batch.append(request)
+        n_images += len(request[1])
+
+    return batch, False
+
+def queue_depth(requests):
+    try:
+        return requests.qsize()
+    except NotImplementedError:
+        # multiprocessing queues cannot report size on macOS
+        return -1
+
+def p95(values):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0
+
+class SchedulerMetrics:
+    def __init__(self, history=256):
+        self.batches = 0
+        self.requests = 0
+        self.images = 0
+        self.queue_depth = 0
+        self.batch_sizes = deque(maxlen=history)
+        self.wait_ms = deque(maxlen=history)
+        self.infer_ms = deque(maxlen=history)
+
+    def record(self, batch, started, finished, depth):
+        self.batches += 1
+        self.requests += len(batch)
+        self.images += sum(len(imgs) for _, imgs, _, _ in batch)
+        self.queue_depth = depth
+        self.batch_sizes.append(sum(len(imgs) for _, imgs, _, _ in batch))
+        # Wait = time from submit until the batch started running
+        self.wait_ms.extend((started - submitted) * 1000 for _, _, _, submitted in batch)
+        self.infer_ms.append((finished - started) * 1000)
+
+    def snapshot(self):
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "images": self.images,
+            "queue_depth": self.queue_depth,
+            "batch_size_mean": statistics.mean(self.batch_sizes) if self.batch_sizes else 0.0,
+            "batch_size_max": max(self.batch_sizes, default=0),
+            "wait_ms_mean": statistics.mean(self.wait_ms) if self.wait_ms else 0.0,
+            "wait_ms_p95": p95(self.wait_ms),
+            "infer_ms_mean": statistics.mean(self.infer_ms) if self.infer_ms else 0.0,
+        }
@@ -0,0 +1,70 @@
+import argparse
+import subprocess
+import sys
+
+# =========================================================
+# STARTUP IMPORT REPORT
+# Runs python -X importtime over the modules New_app.py imports and
+# summarises where UI start-up time goes. Heavy modules must stay lazy
+# (see lazy.py); the report exits non-zero if one is imported eagerly
+# or the total exceeds --budget-ms.
+#   python startup_report.py --top 15 --budget-ms 1500
+# =========================================================
+UI_MODULES = (
+    "streamlit", "config", "detector", "hygiene", "imaging",
+    "inference_worker", "live_stream", "result_cache"
+)
+HEAVY_MODULES = ("torch", "ultralytics", "cv2", "gdown")
+
+def import_times(modules):
+    # One fresh interpreter, so nothing is already cached in sys.modules
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        sys.exit(proc.stderr.strip().splitlines()[-1])
+
+    # "import time: self [us] | cumulative | imported package", nesting by indentation
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise import time of the Streamlit UI process.")
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail above this total")
+    args = parser.parse_args()
+
+    rows = import_times(UI_MODULES)
+    # Depth-0 rows are the direct imports; their cumulative times add up to the total
+    total_ms = sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000
+
+    print(f"{'module':<28}{'cumulative ms':>15}")
+    for name, _, cumulative, depth in rows:
+        if depth == 0 and name in UI_MODULES:
+            print(f"{name:<28}{cumulative / 1000:>15.1f}")
+    print(f"{'total':<28}{total_ms:>15.1f}")
+
+    print(f"\nSlowest {args.top} modules by own import time")
+    for name, self_us, _, _ in sorted(rows, key=lambda row: -row[1])[:args.top]:
+        print(f"{name:<48}{self_us / 1000:>9.1f} ms")
+
+    imported = {name.split(".")[0] for name, _, _, _ in rows}
+    eager = [name for name in HEAVY_MODULES if name in imported]
+    failed = False
+    if eager:
+        print(f"\nImported eagerly (should be lazy): {', '.join(eager)}")
+        failed = True
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"\nStartup imports take {total_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
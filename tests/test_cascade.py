@@ -0,0 +1,22 @@
+import pytest
+
+from hygiene import cascade_stage, near_boundary
+
+@pytest.mark.parametrize("counts, margin, expected", [
+    ({}, 2, False),
+    ({"bacteria": 4}, 1, True),
+    ({"bacteria": 5}, 1, True),
+    ({"bacteria": 2}, 1, False),
+    ({"bacteria": 2}, 3, True),
+    ({"bacteria": 15}, 1, True),
+    ({"bacteria": 10}, 2, False),
+    ({"milk_residues": 11}, 1, True),
+    ({"bacteria": 40, "debries": 30}, 2, False),
+])
+def test_near_boundary(counts, margin, expected):
+    assert near_boundary(counts, margin) is expected
+
+def test_cascade_stage_sums_the_sample():
+    # 2 + 2 bacteria is one short of caution: confirm with the full model
+    assert cascade_stage([{"bacteria": 2}, {"bacteria": 2}], 1) == "full"
+    assert cascade_stage([{"bacteria": 0}, {"debries": 1}], 1) == "fast"
@@ -0,0 +1,41 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from detections import Detections
+
+def make_detections():
+    return Detections(
+        [[0, 0, 10, 10], [5.5, 6.25, 20, 30]], [0, 2], [0.9, 0.4], width=640, height=480
+    )
+
+def test_round_trip():
+    d = make_detections()
+    restored = Detections.from_bytes(d.to_bytes())
+    np.testing.assert_array_equal(restored.xyxy, d.xyxy)
+    np.testing.assert_array_equal(restored.cls, d.cls)
+    np.testing.assert_array_equal(restored.conf, d.conf)
+    assert (restored.width, restored.height) == (640, 480)
+
+def test_round_trip_empty():
+    restored = Detections.from_bytes(Detections.empty(32, 16).to_bytes())
+    assert len(restored) == 0
+    assert restored.xyxy.shape == (0, 4)
+    assert (restored.width, restored.height) == (32, 16)
+
+def test_pickle_uses_compact_form():
+    d = make_detections()
+    restored = pickle.loads(pickle.dumps(d))
+    np.testing.assert_array_equal(restored.xyxy, d.xyxy)
+    assert len(d.to_bytes()) == 17 + 19 * len(d)
+
+def test_rejects_foreign_payload():
+    with pytest.raises(ValueError):
+        Detections.from_bytes(b"XXXX" + bytes(13))
+
+def test_mask_keeps_image_size():
+    d = make_detections()[np.array([False, True])]
+    assert len(d) == 1
+    assert d.cls[0] == 2
+    assert (d.width, d.height) == (640, 480)
@@ -0,0 +1,23 @@
+import pytest
+
+from hygiene import assess, sample_report
+
+@pytest.mark.parametrize("counts, verdict", [
+    ({}, "clean"),
+    ({"bacteria": 4, "milk_residues": 4, "debries": 4}, "clean"),
+    ({"bacteria": 5}, "caution"),
+    ({"bacteria": 15}, "caution"),
+    ({"bacteria": 16}, "critical"),
+    ({"milk_residues": 11}, "critical"),
+    ({"debries": 10}, "caution"),
+    ({"debries": 11}, "critical"),
+])
+def test_assess(counts, verdict):
+    assert assess(counts) == verdict
+
+def test_sample_report():
+    report = sample_report([{"bacteria": 2, "debries": 6}, {"bacteria": 1, "debries": 5}])
+    assert report == {
+        "bacteria": 3, "milk_residues": 0, "debries": 11,
+        "bacteria_per_ml": 3000, "cfu_per_ml": 1000, "verdict": "critical",
+    }
@@ -0,0 +1,36 @@
+import cv2
+import numpy as np
+import pytest
+
+from imaging import decode_image, encode_image, jpeg_scale
+
+def jpeg(height, width):
+    return encode_image(np.full((height, width, 3), 128, np.uint8), "jpeg")
+
+@pytest.mark.parametrize("size, min_size, factor", [
+    ((3024, 4032), 640, 4),
+    ((3024, 4032), 480, 8),
+    ((1280, 960), 640, 2),
+    ((480, 640), 640, 1),
+])
+def test_jpeg_scale(size, min_size, factor):
+    assert jpeg_scale(jpeg(*size), min_size) == factor
+
+def test_jpeg_scale_ignores_other_formats():
+    ok, png = cv2.imencode(".png", np.zeros((4000, 4000, 3), np.uint8))
+    assert jpeg_scale(png.tobytes(), 640) == 1
+
+def test_jpeg_scale_on_corrupt_header():
+    assert jpeg_scale(b"\xff\xd8" + b"\x00" * 64, 640) == 1
+
+def test_decode_at_reduced_scale():
+    img = decode_image(jpeg(1280, 960), min_size=640)
+    assert img.shape == (640, 480, 3)
+
+def test_decode_full_resolution():
+    assert decode_image(jpeg(1280, 960)).shape == (1280, 960, 3)
+
+@pytest.mark.parametrize("data", [b"", b"not an image", b"\xff\xd8" + b"\x00" * 64])
+def test_decode_rejects_corrupt_data(data):
+    with pytest.raises(ValueError):
+        decode_image(data, min_size=640)
@@ -0,0 +1,84 @@
+import queue
+
+import pytest
+
+import inference_worker
+from inference_worker import InferenceWorker
+
+class FakeProcess:
+    # Stands in for the spawned model process; the test plays its side of the queues
+    def __init__(self, target, args, daemon):
+        self.alive = True
+        self.exitcode = None
+
+    def start(self):
+        pass
+
+    def is_alive(self):
+        return self.alive
+
+    def join(self, timeout=None):
+        pass
+
+class FakeContext:
+    Queue = queue.Queue
+    Process = FakeProcess
+
+@pytest.fixture
+def worker(monkeypatch):
+    monkeypatch.setattr(inference_worker.mp, "get_context", lambda method: FakeContext())
+    worker = InferenceWorker()
+    worker._responses.put(("ready", ({"full": ("bacteria",)}, {"full": "v1"}), None))
+    worker.wait_ready(timeout=5)
+    return worker
+
+def request_ids(worker, n):
+    return [worker._requests.get(timeout=5)[0] for _ in range(n)]
+
+def test_ready_carries_labels_and_versions(worker):
+    assert worker.ready
+    assert worker.labels == ("bacteria",)
+    assert worker.version == "v1"
+
+def test_replies_reach_their_own_callers(worker):
+    first, second = worker.submit(["a"]), worker.submit(["b"])
+    first_id, second_id = request_ids(worker, 2)
+    worker._responses.put((second_id, "second result", None))
+    worker._responses.put((first_id, "first result", None))
+    assert first.result(timeout=5) == "first result"
+    assert second.result(timeout=5) == "second result"
+
+def test_worker_errors_are_raised_to_the_caller(worker):
+    future = worker.submit(["a"])
+    request_id, = request_ids(worker, 1)
+    worker._responses.put((request_id, None, "ValueError: bad image"))
+    with pytest.raises(RuntimeError, match="bad image"):
+        future.result(timeout=5)
+
+def test_late_reply_for_a_cancelled_request(worker):
+    abandoned, kept = worker.submit(["a"]), worker.submit(["b"])
+    abandoned_id, kept_id = request_ids(worker, 2)
+    abandoned.cancel()
+    assert abandoned_id not in worker._pending
+    worker._responses.put((abandoned_id, "too late", None))
+    worker._responses.put((kept_id, "result", None))
+    assert kept.result(timeout=5) == "result"
+
+def test_worker_exit_fails_pending_and_new_requests(worker):
+    future = worker.submit(["a"])
+    worker._process.alive = False
+    worker._process.exitcode = -9
+    with pytest.raises(RuntimeError, match="exited with code -9"):
+        future.result(timeout=5)
+    assert not worker.ready
+    assert worker.failed_at is not None
+    with pytest.raises(RuntimeError):
+        worker.submit(["b"]).result(timeout=5)
+
+def test_failed_startup(monkeypatch):
+    monkeypatch.setattr(inference_worker.mp, "get_context", lambda method: FakeContext())
+    worker = InferenceWorker()
+    worker._responses.put(("ready", None, "FileNotFoundError: weights missing"))
+    with pytest.raises(RuntimeError, match="weights missing"):
+        worker.wait_ready(timeout=5)
+    assert worker.error == "FileNotFoundError: weights missing"
@@ -0,0 +1,45 @@
+import time
+
+import numpy as np
+
+from live_stream import ChangeDetector, FramePacer
+
+def frame(value, height=480, width=640):
+    return np.full((height, width, 3), value, np.uint8)
+
+def test_unchanged_frames_are_skipped():
+    changes = ChangeDetector(threshold=4)
+    assert changes.check(frame(100))
+    assert not changes.check(frame(100))
+    assert not changes.check(frame(102))
+    assert changes.check(frame(140))
+
+def test_reference_only_moves_on_detection():
+    # Slow drift below the threshold per frame still triggers once it adds up
+    changes = ChangeDetector(threshold=4)
+    changes.check(frame(100))
+    assert not changes.check(frame(103))
+    assert changes.check(frame(106))
+
+def test_new_frame_size_is_detected():
+    changes = ChangeDetector()
+    changes.check(frame(100))
+    assert changes.check(frame(100, 720, 1280))
+
+def test_stride_follows_source_and_cost():
+    pacer = FramePacer(target_fps=5, source_fps=30)
+    assert pacer.stride == 6
+    # 0.5 s per frame caps processing at 2 fps
+    pacer.record(0.5)
+    assert pacer.stride == 15
+
+def test_camera_without_fps_is_not_skipped():
+    assert FramePacer(target_fps=5, source_fps=0).stride == 1
+
+def test_wait_holds_the_target_rate():
+    pacer = FramePacer(target_fps=20)
+    start = time.perf_counter()
+    for _ in range(3):
+        pacer.wait()
+    assert time.perf_counter() - start >= 2 / 20 - 0.005
+    assert 0 < pacer.fps <= 21
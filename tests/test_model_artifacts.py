@@ -0,0 +1,57 @@
+import os
+import zipfile
+
+import pytest
+
+from model_artifacts import REJECTED_SUFFIX, ensure_artifact, file_sha256
+
+NAME = "weights.pt"
+
+def write_checkpoint(path, payload=b"weights"):
+    # .pt checkpoints are zip archives
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("data.pkl", payload)
+    return path
+
+def pinned(path):
+    return {NAME: {"sha256": file_sha256(path), "size": os.path.getsize(path)}}
+
+def test_offline_refuses_unpinned_weights(tmp_path):
+    local = write_checkpoint(str(tmp_path / "models" / NAME))
+    with pytest.raises(RuntimeError, match="no pinned sha256"):
+        ensure_artifact(NAME, str(tmp_path / "models"), "drive-id", {}, cache_dir="", offline=True)
+    assert os.path.exists(local)
+
+def test_installs_a_verified_cache_entry(tmp_path):
+    cached = write_checkpoint(str(tmp_path / "cache" / NAME))
+    path = ensure_artifact(
+        NAME, str(tmp_path / "models"), "drive-id", pinned(cached), cache_dir=str(tmp_path / "cache"), offline=True
+    )
+    assert path == str(tmp_path / "models" / NAME)
+    assert file_sha256(path) == file_sha256(cached)
+
+def test_ignores_a_cache_entry_that_does_not_match(tmp_path):
+    good = write_checkpoint(str(tmp_path / "good" / NAME))
+    write_checkpoint(str(tmp_path / "cache" / NAME), b"other weights")
+    with pytest.raises(FileNotFoundError):
+        ensure_artifact(
+            NAME, str(tmp_path / "models"), "drive-id", pinned(good), cache_dir=str(tmp_path / "cache"), offline=True
+        )
+
+def test_corrupt_local_weights_are_set_aside(tmp_path):
+    good = write_checkpoint(str(tmp_path / "cache" / NAME))
+    local = write_checkpoint(str(tmp_path / "models" / NAME), b"older weights")
+    manifest = pinned(good)
+
+    # Offline without a good copy: fail, but keep the only local copy
+    with pytest.raises(FileNotFoundError, match="does not match"):
+        ensure_artifact(NAME, str(tmp_path / "models"), "drive-id", manifest, cache_dir="", offline=True)
+    assert not os.path.exists(local)
+    assert os.path.exists(local + REJECTED_SUFFIX)
+
+    # With the cache available the verified copy takes its place
+    path = ensure_artifact(
+        NAME, str(tmp_path / "models"), "drive-id", manifest, cache_dir=str(tmp_path / "cache"), offline=True
+    )
+    assert file_sha256(path) == file_sha256(good)
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from detector import MODEL_PATH, list_images
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Site captures are not shipped; see fixtures/README.md
+FIXTURES_DIR = os.path.abspath(os.environ.get("SOMAEYE_PARITY_FIXTURES", os.path.join(ROOT, "fixtures")))
+
+# Runtime each exported backend needs on top of ultralytics
+RUNTIMES = {"onnx": "onnxruntime", "openvino": "openvino"}
+
+@pytest.fixture(scope="module")
+def fixture_images():
+    if not os.path.isdir(FIXTURES_DIR) or not list_images(FIXTURES_DIR):
+        pytest.skip(f"no fixture images in {FIXTURES_DIR} (see fixtures/README.md)")
+    return list_images(FIXTURES_DIR)
+
+@pytest.fixture(scope="module")
+def reference():
+    pytest.importorskip("ultralytics")
+    if not os.path.exists(os.path.join(ROOT, MODEL_PATH)):
+        pytest.skip(f"{MODEL_PATH} not downloaded")
+    from detector import load_model
+
+    # Weights and exports are resolved relative to the repository root, as in the app
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        yield load_model("torch")
+    finally:
+        os.chdir(cwd)
+
+@pytest.mark.parametrize("backend", sorted(RUNTIMES))
+def test_backend_matches_torch_counts(backend, fixture_images, reference):
+    pytest.importorskip(RUNTIMES[backend])
+    from detector import load_model
+    from parity import check_parity
+
+    assert check_parity(fixture_images, reference, load_model(backend)) == []
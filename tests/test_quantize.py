@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import detector
+from detector import load_export
+from quantize import compare_counts
+
+NAMES = {0: "Bacteria ", 1: "milk_residues", 2: "debries"}
+
+class Tensor:
+    def __init__(self, values):
+        self.values = np.asarray(values, np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values
+
+class StubYOLO:
+    # Stands in for an exported model: one box per class id in `classes`
+    def __init__(self, path, task=None, classes=()):
+        self.names = NAMES
+        self.classes = classes
+
+    def __call__(self, imgs, **kwargs):
+        n = len(self.classes)
+        boxes = SimpleNamespace(
+            xyxy=Tensor(np.tile([0, 0, 10, 10], (n, 1)).reshape(n, 4)),
+            cls=Tensor(self.classes), conf=Tensor([0.9] * n)
+        )
+        return [SimpleNamespace(orig_shape=img.shape[:2], boxes=boxes) for img in imgs]
+
+@pytest.fixture
+def load_stub(monkeypatch):
+    def load(classes):
+        yolo = lambda path, task=None: StubYOLO(path, task, classes)
+        monkeypatch.setattr(detector, "ultralytics", SimpleNamespace(YOLO=yolo))
+        return load_export("models/stub_int8_openvino_model/")
+    return load
+
+def test_compare_counts_on_exported_models(load_stub):
+    fp32_model = load_stub([0, 0, 2])
+    int8_model = load_stub([0, 2, 2])
+    imgs = [np.zeros((32, 32, 3), np.uint8)] * 2
+
+    per_class, per_image = compare_counts(imgs, fp32_model, int8_model)
+    assert per_image[0] == {"fp32": {"bacteria": 2, "debries": 1}, "int8": {"bacteria": 1, "debries": 2}}
+    assert per_class["bacteria"] == {"mean_abs_error": 1, "max_abs_error": 1, "bias": -1}
+    assert per_class["debries"] == {"mean_abs_error": 1, "max_abs_error": 1, "bias": 1}
@@ -0,0 +1,43 @@
+import numpy as np
+
+from detections import Detections
+from result_cache import DetectionCache, LRUCache, cache_key
+
+def detections(n=2):
+    return Detections(np.tile([0, 0, 10, 10], (n, 1)), np.arange(n) % 3, np.full(n, 0.5), 640, 480)
+
+def test_cache_key_covers_data_model_and_settings():
+    key = cache_key(b"image", "v1", 0.25, 0.5, "tiled=0")
+    assert key == cache_key(b"image", "v1", 0.25, 0.5, "tiled=0")
+    assert len({
+        key,
+        cache_key(b"other image", "v1", 0.25, 0.5, "tiled=0"),
+        cache_key(b"image", "v2", 0.25, 0.5, "tiled=0"),
+        cache_key(b"image", "v1", 0.3, 0.5, "tiled=0"),
+        cache_key(b"image", "v1", 0.25, 0.6, "tiled=0"),
+        cache_key(b"image", "v1", 0.25, 0.5, "tiled=1"),
+    }) == 6
+
+def test_lru_evicts_the_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+def test_disk_entries_survive_a_new_cache(tmp_path):
+    DetectionCache(disk_dir=str(tmp_path)).put("key", detections(3))
+
+    restored = DetectionCache(disk_dir=str(tmp_path)).get("key")
+    assert len(restored) == 3
+    assert (restored.width, restored.height) == (640, 480)
+    assert [p.name for p in tmp_path.iterdir()] == ["key.det"]
+
+def test_miss_without_disk():
+    cache = DetectionCache(max_entries=1)
+    assert cache.get("missing") is None
+    cache.put("a", detections())
+    cache.put("b", detections())
+    assert cache.get("a") is None
@@ -0,0 +1,44 @@
+import queue
+import time
+
+from scheduler import collect_batch
+
+def request(request_id, n_images):
+    return request_id, [object()] * n_images, None, time.monotonic()
+
+def test_gathers_requests_within_the_window():
+    requests = queue.Queue()
+    for i in range(3):
+        requests.put(request(i, 1))
+    batch, stop = collect_batch(requests, window_s=0.05, max_images=8)
+    assert [r[0] for r in batch] == [0, 1, 2]
+    assert not stop
+
+def test_stops_at_max_images():
+    requests = queue.Queue()
+    for i in range(4):
+        requests.put(request(i, 2))
+    batch, _ = collect_batch(requests, window_s=1.0, max_images=4)
+    assert [r[0] for r in batch] == [0, 1]
+    assert requests.qsize() == 2
+
+def test_window_bounds_the_wait():
+    requests = queue.Queue()
+    requests.put(request(0, 1))
+    start = time.monotonic()
+    batch, _ = collect_batch(requests, window_s=0.05, max_images=8)
+    assert len(batch) == 1
+    assert time.monotonic() - start < 0.5
+
+def test_stop_sentinel():
+    requests = queue.Queue()
+    requests.put(None)
+    assert collect_batch(requests, 0.05, 8) == ([], True)
+
+def test_stop_sentinel_after_requests_keeps_the_batch():
+    requests = queue.Queue()
+    requests.put(request(0, 1))
+    requests.put(None)
+    batch, stop = collect_batch(requests, 0.05, 8)
+    assert [r[0] for r in batch] == [0]
+    assert stop
@@ -0,0 +1,73 @@
+import numpy as np
+
+from detections import Detections
+from detector import make_tiles, merge_tile_detections
+
+def coverage(img, tiles):
+    covered = np.zeros(img.shape[:2], bool)
+    for x, y, crop in tiles:
+        covered[y:y + crop.shape[0], x:x + crop.shape[1]] = True
+    return covered
+
+def test_small_image_is_one_tile():
+    img = np.zeros((480, 600, 3), np.uint8)
+    tiles = make_tiles(img, tile_size=640)
+    assert [(x, y) for x, y, _ in tiles] == [(0, 0)]
+
+def test_tiles_cover_the_image():
+    img = np.zeros((1000, 1500, 3), np.uint8)
+    tiles = make_tiles(img, tile_size=640, overlap=0.2, max_tiles=16)
+    assert all(crop.shape[:2] == (640, 640) for _, _, crop in tiles)
+    assert coverage(img, tiles).all()
+
+def test_tiles_grow_to_respect_max_tiles():
+    img = np.zeros((3000, 4000, 3), np.uint8)
+    tiles = make_tiles(img, tile_size=640, overlap=0.2, max_tiles=4)
+    assert len(tiles) <= 4
+    assert coverage(img, tiles).all()
+
+# Two tiles side by side, overlapping on x in [512, 640)
+RECTS = np.array([[0, 0, 640, 640], [512, 0, 1152, 640]], np.float32)
+
+def merge(boxes, cls, conf, tile_ids, **kwargs):
+    d = Detections(boxes, cls, conf, 1152, 640)
+    return merge_tile_detections(d, np.array(tile_ids), tile_rects=RECTS, **kwargs)
+
+def test_colony_cut_by_tile_edge_is_merged():
+    # The left tile only sees the part of the colony up to its edge at x=640
+    merged = merge([[600, 100, 640, 140], [600, 100, 650, 150]], [0, 0], [0.6, 0.9], [0, 1])
+    assert len(merged) == 1
+    np.testing.assert_array_equal(merged.xyxy[0], [600, 100, 650, 150])
+
+def test_dropped_box_does_not_suppress():
+    # B duplicates A and C, but A and C are separate colonies: greedy merging keeps A and C
+    merged = merge(
+        [[520, 100, 560, 140], [520, 100, 620, 140], [580, 100, 620, 140]], [0, 0, 0], [0.9, 0.8, 0.7], [0, 1, 0]
+    )
+    np.testing.assert_array_equal(merged.xyxy, [[520, 100, 560, 140], [580, 100, 620, 140]])
+
+def test_overlapping_boxes_of_one_tile_are_kept():
+    # Within a tile the model's own NMS already decided these are two colonies
+    merged = merge([[100, 100, 140, 140], [105, 105, 145, 145]], [0, 0], [0.9, 0.8], [0, 0])
+    assert len(merged) == 2
+
+def test_other_classes_are_not_merged():
+    merged = merge([[600, 100, 640, 140], [600, 100, 650, 150]], [0, 1], [0.6, 0.9], [0, 1])
+    assert len(merged) == 2
+
+def test_strip_filter_and_blocks_do_not_change_the_result():
+    rng = np.random.default_rng(0)
+    n = 400
+    # Crowded around the shared strip, plus boxes well inside each tile
+    x = np.concatenate([rng.uniform(500, 600, n - 100), rng.uniform(0, 400, 50), rng.uniform(700, 1100, 50)])
+    xy = np.stack([x, rng.uniform(0, 200, n)], axis=1).astype(np.float32)
+    boxes = np.hstack([xy, xy + rng.uniform(5, 40, (n, 2)).astype(np.float32)])
+    cls = rng.integers(0, 3, n)
+    conf = rng.uniform(0.25, 1, n)
+    tile_ids = (boxes[:, 0] >= 576).astype(int)
+
+    d = Detections(boxes, cls, conf, 1152, 640)
+    full = merge_tile_detections(d, tile_ids)
+    filtered = merge_tile_detections(d, tile_ids, tile_rects=RECTS, block=7)
+    np.testing.assert_array_equal(np.sort(full.conf), np.sort(filtered.conf))
+    assert len(full) < n
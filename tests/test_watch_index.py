@@ -0,0 +1,24 @@
+from watch_folder import ProcessedIndex
+
+def test_records_scored_samples(tmp_path):
+    paths = [str(tmp_path / name) for name in ("a.jpg", "b.jpg")]
+    for path in paths:
+        open(path, "wb").close()
+    index = ProcessedIndex(str(tmp_path / "index.sqlite"))
+    sample_id = index.record(paths, {"images": ";".join(paths), "bacteria": 3, "verdict": "clean"})
+    assert index.processed_paths() == set(paths)
+    index.close()
+
+    # A restart sees the same processed files
+    index = ProcessedIndex(str(tmp_path / "index.sqlite"))
+    assert index.processed_paths() == set(paths)
+    row = index._db.execute("SELECT bacteria, verdict FROM samples WHERE id = ?", (sample_id,)).fetchone()
+    assert row == (3, "clean")
+    index.close()
+
+def test_failed_samples_stay_unprocessed(tmp_path):
+    index = ProcessedIndex(str(tmp_path / "index.sqlite"))
+    index.record(["/missing/a.jpg"], {"images": "/missing/a.jpg", "error": "OSError: unreadable"})
+    assert index.processed_paths() == set()
+    assert index._db.execute("SELECT error FROM samples").fetchone() == ("OSError: unreadable",)
+    index.close()
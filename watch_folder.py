@@ -0,0 +1,280 @@
+import argparse
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+import json
+import logging
+import multiprocessing as mp
+import os
+import queue
+import sqlite3
+import time
+
+from batch_score import init_worker, score_sample
+from config import MODEL_BACKEND, TILED_INFERENCE
+from detector import BACKENDS, IMAGE_EXTENSIONS, prepare_model
+from hygiene import CRITICAL_ABOVE
+
+logger = logging.getLogger(__name__)
+
+# =========================================================
+# WATCH-FOLDER INGESTION
+# Fixed cameras drop JPEGs into a folder (often a network share). New
+# files are picked up from inotify events (watchdog), or by polling when
+# inotify is unavailable or unreliable (--poll, e.g. NFS/SMB mounts).
+# A file counts as arrived once its size has been stable for --settle
+# seconds; arrived files are paired in name order and scored by the
+# batch_score worker pool. Backpressure: at most --max-in-flight samples
+# are decoded/in inference at a time, later files wait on disk as paths.
+# Results and processed files go to a SQLite index, so a restart picks
+# up only what was not finished. A sample that fails goes back to the
+# queue up to --retries times; failed files are never marked processed,
+# so a restart tries them again. When a worker dies, the pool is rebuilt
+# and the samples it had in flight rerun one at a time, so only the one
+# that crashes again counts as failed.
+#   python watch_folder.py /mnt/cip-camera --output results.jsonl
+# =========================================================
+SAMPLE_COLUMNS = tuple(CRITICAL_ABOVE) + ("bacteria_per_ml", "cfu_per_ml", "verdict", "error")
+
+class ProcessedIndex:
+    def __init__(self, path):
+        self._db = sqlite3.connect(path)
+        self._db.executescript(f"""
+            CREATE TABLE IF NOT EXISTS samples (
+                id INTEGER PRIMARY KEY, images TEXT, processed_at REAL,
+                {", ".join(f"{column} {'TEXT' if column in ('verdict', 'error') else 'INTEGER'}"
+                           for column in SAMPLE_COLUMNS)}
+            );
+            CREATE TABLE IF NOT EXISTS processed_files (
+                path TEXT PRIMARY KEY, size INTEGER, mtime REAL,
+                sample_id INTEGER REFERENCES samples(id)
+            );
+        """)
+
+    def processed_paths(self):
+        return {path for path, in self._db.execute("SELECT path FROM processed_files")}
+
+    def record(self, paths, row):
+        # One transaction: a sample is either fully recorded or reprocessed after a crash.
+        # Failed samples are logged but their files stay unprocessed.
+        with self._db:
+            cursor = self._db.execute(
+                f"INSERT INTO samples (images, processed_at, {', '.join(SAMPLE_COLUMNS)}) "
+                f"VALUES (?, ?, {', '.join('?' * len(SAMPLE_COLUMNS))})",
+                (row["images"], time.time(), *(row.get(column) for column in SAMPLE_COLUMNS))
+            )
+            if row.get("error"):
+                return cursor.lastrowid
+            for path in paths:
+                stat = os.stat(path) if os.path.exists(path) else None
+                self._db.execute(
+                    "INSERT OR REPLACE INTO processed_files VALUES (?, ?, ?, ?)",
+                    (path, stat and stat.st_size, stat and stat.st_mtime, cursor.lastrowid)
+                )
+        return cursor.lastrowid
+
+    def close(self):
+        self._db.close()
+
+def is_image(path):
+    return path.lower().endswith(IMAGE_EXTENSIONS) and not os.path.basename(path).startswith(".")
+
+def scan(folder):
+    return [entry.path for entry in os.scandir(folder) if entry.is_file() and is_image(entry.path)]
+
+def start_observer(folder, events, poll):
+    # inotify through watchdog; None means the main loop polls the folder itself
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+        from watchdog.observers.polling import PollingObserver
+    except ImportError:
+        logger.warning("watchdog is not installed; polling %s", folder)
+        return None
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.is_directory:
+                return
+            # Created, modified, closed, or moved in (dest_path) all mean "look at this file"
+            path = getattr(event, "dest_path", "") or event.src_path
+            if is_image(path):
+                events.put(path)
+
+    observer = PollingObserver() if poll else Observer()
+    observer.schedule(Handler(), folder, recursive=False)
+    try:
+        observer.start()
+    except OSError as exc:
+        # e.g. inotify watch limit reached
+        logger.warning("inotify unavailable (%s); polling %s", exc, folder)
+        observer = PollingObserver()
+        observer.schedule(Handler(), folder, recursive=False)
+        observer.start()
+    return observer
+
+def watch(folder, index, make_pool, group_size, max_in_flight, settle, interval, out, poll=False, retries=2):
+    # make_pool() -> executor; called again if a worker process dies and breaks the pool
+    folder = os.path.abspath(folder)
+    events = queue.SimpleQueue()
+    observer = start_observer(folder, events, poll)
+    pool = make_pool()
+
+    done = index.processed_paths()
+    # path -> (size, time it was last seen changing); files still being written stay here
+    candidates = {path: (None, 0) for path in scan(folder) if path not in done}
+    in_flight = {}
+    claimed = set()
+    # path -> failed attempts in this run
+    failures = {}
+    suspects = deque()
+    isolated = None
+    last_scan = time.monotonic()
+
+    try:
+        while True:
+            now = time.monotonic()
+            while True:
+                try:
+                    path = os.path.abspath(events.get_nowait())
+                except queue.Empty:
+                    break
+                if path not in done and path not in claimed:
+                    candidates.setdefault(path, (None, 0))
+            if observer is None and now - last_scan >= interval:
+                for path in scan(folder):
+                    if path not in done and path not in claimed:
+                        candidates.setdefault(path, (None, 0))
+                last_scan = now
+
+            # Arrived = size unchanged for `settle` seconds
+            arrived = []
+            for path, (size, changed_at) in list(candidates.items()):
+                try:
+                    current = os.path.getsize(path)
+                except OSError:
+                    del candidates[path]
+                    continue
+                if current != size:
+                    candidates[path] = (current, now)
+                elif now - changed_at >= settle:
+                    arrived.append(path)
+            arrived.sort()
+
+            # Backpressure: only max_in_flight samples are submitted; the rest wait as paths.
+            # After a worker crash no new samples go out until the suspects are cleared.
+            broken = False
+            while not suspects and isolated not in in_flight and len(arrived) >= group_size and len(in_flight) < max_in_flight:
+                sample, arrived = arrived[:group_size], arrived[group_size:]
+                for path in sample:
+                    del candidates[path]
+                    claimed.add(path)
+                try:
+                    in_flight[pool.submit(score_sample, sample)] = sample
+                except BrokenProcessPool:
+                    suspects.append(sample)
+                    broken = True
+                    break
+
+            # Samples that were in flight when a worker died are rerun one at a time,
+            # so only the one that crashes its worker again is charged for it
+            if suspects and not in_flight and not broken:
+                sample = suspects.popleft()
+                try:
+                    isolated = pool.submit(score_sample, sample)
+                    in_flight[isolated] = sample
+                except BrokenProcessPool:
+                    suspects.appendleft(sample)
+                    broken = True
+
+            if broken:
+                finished = ()
+            elif in_flight:
+                finished, _ = wait(in_flight, timeout=interval, return_when=FIRST_COMPLETED)
+            else:
+                time.sleep(interval)
+                continue
+
+            for future in finished:
+                sample = in_flight.pop(future)
+                try:
+                    row = future.result()
+                except BrokenProcessPool as exc:
+                    broken = True
+                    if future is not isolated:
+                        suspects.append(sample)
+                        continue
+                    row = {"images": ";".join(sample), "error": f"{type(exc).__name__}: {exc}"}
+                row["sample"] = index.record(sample, row)
+                claimed.difference_update(sample)
+                if row.get("error"):
+                    for path in sample:
+                        failures[path] = failures.get(path, 0) + 1
+                        if failures[path] <= retries:
+                            # Back through the settle check, which also spaces out the attempts
+                            candidates[path] = (None, 0)
+                        else:
+                            logger.error("giving up on %s until restart after %d attempts", path, failures[path])
+                            done.add(path)
+                else:
+                    done.update(sample)
+                logger.info("sample %s %s: %s", row["sample"], row["images"], row.get("verdict", row.get("error")))
+                if out:
+                    out.write(json.dumps(row) + "\n")
+                    out.flush()
+
+            if broken:
+                # Every other future of a broken pool fails the same way: rerun them all
+                suspects.extend(in_flight.values())
+                in_flight.clear()
+                logger.error("worker process died; restarting the pool")
+                if suspects:
+                    logger.info("rerunning %d sample(s) one at a time", len(suspects))
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = make_pool()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        if observer is not None:
+            observer.stop()
+            observer.join()
+
+def main():
+    parser = argparse.ArgumentParser(description="Score images as cameras drop them into a folder.")
+    parser.add_argument("folder", help="folder the cameras write to")
+    parser.add_argument("--group-size", type=int, default=2, help="images per sample")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--max-in-flight", type=int, default=None, help="samples in progress (default 2 x workers)")
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds a file size must be stable")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between checks")
+    parser.add_argument("--poll", action="store_true", help="poll instead of inotify (network shares)")
+    parser.add_argument("--index", default="watch_index.sqlite", help="SQLite index of processed files")
+    parser.add_argument("--output", help="also append one JSON line per sample here")
+    parser.add_argument("--retries", type=int, default=2, help="extra attempts for a failed sample")
+    parser.add_argument("--backend", default=MODEL_BACKEND, choices=BACKENDS)
+    parser.add_argument("--tiled", action="store_true", default=TILED_INFERENCE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    prepare_model(args.backend)
+
+    index = ProcessedIndex(args.index)
+    out = open(args.output, "a") if args.output else None
+    make_pool = partial(
+        ProcessPoolExecutor, max_workers=args.workers, mp_context=mp.get_context("spawn"),
+        initializer=init_worker, initargs=(args.backend, args.tiled)
+    )
+    try:
+        watch(
+            args.folder, index, make_pool, args.group_size, args.max_in_flight or 2 * args.workers,
+            args.settle, args.interval, out, args.poll, args.retries
+        )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        index.close()
+        if out:
+            out.close()
+
+if __name__ == "__main__":
+    main()